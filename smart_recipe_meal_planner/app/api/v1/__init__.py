@@ -1,13 +1,32 @@
+import importlib
+import pkgutil
+from functools import cache
 
 from fastapi import APIRouter
-# Assuming app.api.v1.endpoints.recipes will exist and have a router attribute
-from .endpoints import recipes
-from .endpoints import external_recipes # New router import
 
-api_v1_router = APIRouter()
 
-# This will work if recipes.py defines a router = APIRouter()
-# If recipes.py is empty or recipes.router doesnt exist, FastAPI might complain at startup
-# but the file itself can be written.
-api_v1_router.include_router(recipes.router, prefix="/recipes", tags=["Recipes"])
-api_v1_router.include_router(external_recipes.router, prefix="/external-recipes", tags=["External Recipes"]) # Added new router
+@cache
+def build_router() -> APIRouter:
+    """
+    Builds the v1 router from the endpoint modules, once.
+
+    Endpoints are imported here rather than at package import, so importing
+    e.g. app.api.v1.dependencies doesn't pull in every endpoint module.
+    """
+    from . import endpoints
+
+    api_v1_router = APIRouter()
+
+    # Every module in app/api/v1/endpoints that defines `router` is mounted under
+    # its module name: external_recipes.py -> /external-recipes, tag "External Recipes".
+    for _, module_name, _ in pkgutil.iter_modules(endpoints.__path__):
+        module = importlib.import_module(f"{endpoints.__name__}.{module_name}")
+        router = getattr(module, "router", None)
+        if router is None:
+            continue
+        api_v1_router.include_router(
+            router,
+            prefix="/" + module_name.replace("_", "-"),
+            tags=[module_name.replace("_", " ").title()],
+        )
+    return api_v1_router
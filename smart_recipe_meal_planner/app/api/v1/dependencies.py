@@ -1,36 +1,64 @@
-from typing import Generator, Optional
+from functools import lru_cache
+from typing import AsyncGenerator, Optional
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import SessionLocal
+from app.clients.spoonacular_client import SpoonacularClient
+from app.db.session import AsyncSessionLocal
 from app.services.recipe_service import RecipeService
 from app.db.models.user_model import User as DBUser # For current_user type hint
 import uuid # For dummy user ID
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def get_recipe_service(db: Session = Depends(get_db)) -> RecipeService:
-    return RecipeService(db=db)
+@lru_cache
+def _shared_spoonacular_client() -> Optional[SpoonacularClient]:
+    # One client (and connection pool) for the whole process.
+    # Returns None when no API key is configured so routes that never call
+    # Spoonacular keep working; the service reports the config error on use.
+    try:
+        return SpoonacularClient()
+    except ValueError:
+        return None
+
+async def close_spoonacular_client() -> None:
+    # Called at shutdown. Only a client that was actually created is closed;
+    # calling _shared_spoonacular_client() here would build one just to close it.
+    if _shared_spoonacular_client.cache_info().currsize:
+        client = _shared_spoonacular_client()
+        _shared_spoonacular_client.cache_clear()
+        if client is not None:
+            await client.close()
+
+# Dependencies are async def so FastAPI awaits them directly instead of
+# running each one in its threadpool.
+async def get_spoonacular_client() -> Optional[SpoonacularClient]:
+    return _shared_spoonacular_client()
+
+async def get_recipe_service(
+    db: AsyncSession = Depends(get_db),
+    spoonacular_client: Optional[SpoonacularClient] = Depends(get_spoonacular_client),
+) -> RecipeService:
+    return RecipeService(db=db, spoonacular_client=spoonacular_client)
 
 # Placeholder for current user dependency - Replace with actual authentication
-async def get_current_active_user(db: Session = Depends(get_db)) -> DBUser:
+async def get_current_active_user(db: AsyncSession = Depends(get_db)) -> DBUser:
     # In a real app, this would involve token validation etc.
     # For now, fetch a user or create/return a dummy one.
     # This is NOT secure and only for placeholder functionality.
     user_id_to_fetch = uuid.UUID("00000000-0000-0000-0000-000000000000") # Example fixed UUID
     # Assuming User model has an 'id' field of type UUID
-    user = db.query(DBUser).filter(DBUser.id == user_id_to_fetch).first()
+    result = await db.execute(select(DBUser).where(DBUser.id == user_id_to_fetch))
+    user = result.scalars().first()
     if not user:
         # If you want to ensure a user always exists for this placeholder:
         # user = DBUser(id=user_id_to_fetch, email="testuser@example.com", hashed_password="dummy_password", is_active=True, is_superuser=False) # Add other required fields
         # db.add(user)
-        # db.commit()
-        # db.refresh(user)
+        # await db.commit()
+        # await db.refresh(user)
         # For now, if fixed UUID user doesn't exist, raise error to indicate setup needed.
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+import hashlib
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query, Path
+from typing import List, Optional
 from uuid import UUID
 
 from app.models.recipe_schemas import (
@@ -8,15 +11,31 @@ from app.models.recipe_schemas import (
     RecipeUpdate,
     PaginatedExternalRecipeSearchResponse, # Added import
 )
-from app.services.recipe_service import RecipeService
+from app.services.recipe_service import RecipeService, RecipeNotFoundException, RecipeForbiddenException
 # Corrected import path for Spoonacular exceptions
 from app.clients.spoonacular_client import SpoonacularRateLimitException, SpoonacularException
 from app.api.v1.dependencies import get_recipe_service, get_current_active_user
 from app.db.models.user_model import User as DBUser
 
+# Routes only catch the errors they map to specific status codes; database and
+# unexpected errors are handled app-wide (app.core.exception_handlers).
 router = APIRouter()
 
 
+def _json_with_etag(request: Request, content: str) -> Response:
+    """
+    Returns `content` as JSON with an ETag derived from it, or an empty 304 when
+    the client's If-None-Match already names that ETag.
+    """
+    body = content.encode()
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    # If-None-Match may list several tags, weak (W/"...") ones included
+    client_etags = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+    if etag in client_etags or "*" in client_etags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
 @router.post("/", response_model=RecipePublic, status_code=status.HTTP_201_CREATED)
 async def create_recipe(
     recipe_in: RecipeCreate,
@@ -26,62 +45,78 @@ async def create_recipe(
     """
     Create new recipe.
     """
-    try:
-        recipe = await recipe_service.create_recipe(recipe_in=recipe_in, user_id=current_user.id)
-        return recipe
-    except Exception as e:
-        # More specific error handling can be added here if the service method
-        # raises specific exceptions that need to be mapped to different HTTP status codes.
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An unexpected error occurred while creating the recipe.",
-        ) from e
+    recipe = await recipe_service.create_recipe(recipe_in=recipe_in, user_id=current_user.id)
+    return recipe
 
 
 @router.get("/", response_model=PaginatedRecipeResponse)
 async def list_recipes(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page; replaces page"),
+    include_total: bool = Query(True, description="Report totalItems/totalPages; false skips counting every matching recipe"),
+    search: Optional[str] = Query(None, min_length=2, max_length=200, description="Full-text search over title and description; best matches first"),
+    cuisine: Optional[str] = Query(None, max_length=50, description="Only recipes of this cuisine type"),
+    dietary_tags: Optional[List[str]] = Query(None, description="Only recipes carrying every given tag; repeat the parameter for several"),
+    max_cook_time: Optional[int] = Query(None, ge=0, description="Only recipes cooking in at most this many minutes"),
     recipe_service: RecipeService = Depends(get_recipe_service),
 ):
     """
     List recipes with pagination.
     """
     try:
-        recipes_list, pagination_meta = await recipe_service.get_recipes_list(page=page, limit=limit)
-        return PaginatedRecipeResponse(data=recipes_list, pagination=pagination_meta)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An unexpected error occurred while listing recipes.",
-        ) from e
+        recipes_list, pagination_meta = await recipe_service.get_recipes_list(
+            page=page, limit=limit, cuisine=cuisine, dietary_tags=dietary_tags, max_cook_time=max_cook_time,
+            search_query=search, cursor=cursor, include_total=include_total
+        )
+    except ValueError as e: # Malformed cursor, or a cursor combined with search
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    page_response = PaginatedRecipeResponse(data=recipes_list, pagination=pagination_meta)
+    # The items are already RecipePublic objects. Returning the JSON
+    # directly skips FastAPI dumping the page and validating it again against
+    # response_model; pydantic-core serializes it in one pass.
+    return _json_with_etag(request, page_response.model_dump_json())
+
+
+@router.get("/search-external", response_model=PaginatedExternalRecipeSearchResponse, summary="Search Recipes from External Source (Spoonacular)", description="Searches for recipes on Spoonacular based on a query string. Requires authentication.")
+async def search_external_recipes(
+    query: str = Query(..., min_length=3, description="Search query for recipes"),
+    page: int = Query(1, ge=1, description="Page number for pagination"),
+    limit: int = Query(10, ge=1, le=30, description="Number of results per page"),
+    recipe_service: RecipeService = Depends(get_recipe_service),
+    current_user: DBUser = Depends(get_current_active_user), # Added dependency
+):
+    """
+    Search recipes from Spoonacular.
+    """
+    try:
+        results = await recipe_service.search_external_recipes(query=query, page=page, limit=limit)
+        # The service returns a dict with 'results' and 'pagination' keys
+        # which maps to 'data' and 'pagination' in PaginatedExternalRecipeSearchResponse
+        return PaginatedExternalRecipeSearchResponse(data=results.get("results", []), pagination=results.get("pagination", {}))
+    except SpoonacularRateLimitException as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    except SpoonacularException as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
 
 
 @router.get("/{recipe_id}", response_model=RecipePublic)
 async def get_recipe(
     recipe_id: UUID,
+    request: Request,
     recipe_service: RecipeService = Depends(get_recipe_service),
 ):
     """
     Get a specific recipe by its ID.
     """
-    try:
-        recipe = await recipe_service.get_recipe_by_id(recipe_id=recipe_id)
-        if recipe is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Recipe not found",
-            )
-        return recipe
-    except HTTPException as http_exc:
-        # Re-raise HTTPException to ensure FastAPI handles it correctly
-        raise http_exc
-    except Exception as e:
-        # Catch any other unexpected errors
+    recipe = await recipe_service.get_recipe_by_id(recipe_id=recipe_id)
+    if recipe is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An unexpected error occurred while retrieving the recipe.",
-        ) from e
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipe not found",
+        )
+    return _json_with_etag(request, recipe.model_dump_json())
 
 
 @router.put("/{recipe_id}", response_model=RecipePublic)
@@ -95,36 +130,22 @@ async def update_recipe_endpoint(
     Update a specific recipe.
     """
     try:
-        # First, check if the recipe exists
-        existing_recipe = await recipe_service.get_recipe_by_id(recipe_id=recipe_id)
-        if existing_recipe is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Recipe not found",
-            )
-
-        # If it exists, attempt to update it
+        # The service looks the recipe up itself and reports a missing recipe
+        # or a non-owner through its exceptions.
         updated_recipe = await recipe_service.update_recipe(
             recipe_id=recipe_id, recipe_in=recipe_in, user_id=current_user.id
         )
-
-        if updated_recipe is None:
-            # If update_recipe returns None, and we know the recipe exists,
-            # it means the user is not authorized.
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this recipe",
-            )
         return updated_recipe
-    except HTTPException as http_exc:
-        # Re-raise HTTPException to ensure FastAPI handles it correctly
-        raise http_exc
-    except Exception as e:
-        # Catch any other unexpected errors
+    except RecipeNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipe not found",
+        )
+    except RecipeForbiddenException:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An unexpected error occurred while updating the recipe.",
-        ) from e
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update this recipe",
+        )
 
 
 @router.delete("/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -137,63 +158,19 @@ async def delete_recipe_endpoint(
     Delete a specific recipe.
     """
     try:
-        # First, check if the recipe exists
-        existing_recipe = await recipe_service.get_recipe_by_id(recipe_id=recipe_id)
-        if existing_recipe is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Recipe not found",
-            )
-
-        # If it exists, attempt to delete it
-        deleted_successfully = await recipe_service.delete_recipe(
-            recipe_id=recipe_id, user_id=current_user.id
-        )
-
-        if not deleted_successfully:
-            # If delete_recipe returns False, and we know the recipe exists,
-            # it means the user is not authorized.
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to delete this recipe",
-            )
-        # If deletion was successful, FastAPI will return a 204 No Content response
-        # because of the status_code in the decorator and no return value.
+        await recipe_service.delete_recipe(recipe_id=recipe_id, user_id=current_user.id)
+        # FastAPI returns 204 No Content because of the status_code in the decorator.
         return
-    except HTTPException as http_exc:
-        # Re-raise HTTPException to ensure FastAPI handles it correctly
-        raise http_exc
-    except Exception as e:
-        # Catch any other unexpected errors
+    except RecipeNotFoundException:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An unexpected error occurred while deleting the recipe.",
-        ) from e
-
-
-@router.get("/search-external", response_model=PaginatedExternalRecipeSearchResponse, summary="Search Recipes from External Source (Spoonacular)", description="Searches for recipes on Spoonacular based on a query string. Requires authentication.")
-async def search_external_recipes(
-    query: str = Query(..., min_length=3, description="Search query for recipes"),
-    page: int = Query(1, ge=1, description="Page number for pagination"),
-    limit: int = Query(10, ge=1, le=30, description="Number of results per page"),
-    recipe_service: RecipeService = Depends(get_recipe_service),
-    current_user: DBUser = Depends(get_current_active_user), # Added dependency
-):
-    """
-    Search recipes from Spoonacular.
-    """
-    try:
-        results = await recipe_service.search_external_recipes(query=query, page=page, limit=limit)
-        # The service returns a dict with 'results' and 'pagination' keys
-        # which maps to 'data' and 'pagination' in PaginatedExternalRecipeSearchResponse
-        return PaginatedExternalRecipeSearchResponse(data=results.get("results", []), pagination=results.get("pagination", {}))
-    except SpoonacularRateLimitException as e:
-        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
-    except SpoonacularException as e:
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
-    except Exception as e:
-        # Log the exception e for debugging
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred while searching external recipes.")
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipe not found",
+        )
+    except RecipeForbiddenException:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to delete this recipe",
+        )
 
 
 @router.post("/import-external/{spoonacular_id}", response_model=RecipePublic, status_code=status.HTTP_200_OK, summary="Import Recipe from External Source (Spoonacular)", description="Imports a recipe from Spoonacular using its ID and saves it to the local database. If the recipe already exists locally (based on Spoonacular ID), it returns the existing local recipe. Requires authentication.")
@@ -218,6 +195,3 @@ async def import_external_recipe(
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except ValueError as e: # For data mapping issues or if recipe structure is not as expected
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
-    except Exception as e:
-        # Log the exception e for debugging
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred while importing the recipe.")
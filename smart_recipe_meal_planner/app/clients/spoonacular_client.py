@@ -1,4 +1,5 @@
 import httpx
+import orjson
 from ..core.config import settings
 
 class SpoonacularException(Exception):
@@ -40,7 +41,7 @@ class SpoonacularClient:
                 )
 
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except httpx.HTTPStatusError as e:
             raise SpoonacularException(
                 f"API request to {e.request.url} failed with status {e.response.status_code}: {e.response.text}"
@@ -0,0 +1,45 @@
+import logging
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+
+async def integrity_error_handler(request: Request, exc: IntegrityError) -> JSONResponse:
+    # e.g. a duplicate spoonacular_id or a link to an ingredient that doesn't exist
+    logger.warning(f"Integrity error on {request.method} {request.url.path}: {exc.orig!r}")
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "The request conflicts with existing data."},
+    )
+
+
+async def database_error_handler(request: Request, exc: SQLAlchemyError) -> JSONResponse:
+    logger.exception(f"Database error on {request.method} {request.url.path}", exc_info=exc)
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": "An unexpected database error occurred."},
+    )
+
+
+async def unexpected_error_handler(request: Request, exc: Exception) -> JSONResponse:
+    # Starlette still re-raises the exception after sending this response, so
+    # it is logged with its traceback by the server.
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": "An unexpected error occurred."},
+    )
+
+
+def register_exception_handlers(app: FastAPI) -> None:
+    """
+    Maps errors the endpoints don't handle themselves to responses, so routes
+    only catch the exceptions they turn into specific status codes.
+    """
+    # The most specific handler for an exception's class wins, so IntegrityError
+    # gets its 409 even though it is also a SQLAlchemyError.
+    app.add_exception_handler(IntegrityError, integrity_error_handler)
+    app.add_exception_handler(SQLAlchemyError, database_error_handler)
+    app.add_exception_handler(Exception, unexpected_error_handler)
@@ -6,7 +6,7 @@ from app.db.base_class import Base
 class RecipeIngredient(Base):
     recipe_id = Column(UUID(as_uuid=True), ForeignKey('recipes.id', ondelete='CASCADE'), nullable=False)
     ingredient_id = Column(UUID(as_uuid=True), ForeignKey('ingredients.id', ondelete='CASCADE'), nullable=False)
-    quantity = Column(Numeric(10, 2), nullable=False)
+    quantity = Column(Numeric(10, 2, asdecimal=False), nullable=False) # Read as float, like the API field
     unit = Column(String(50), nullable=False)
     preparation_note = Column(String(255))
 
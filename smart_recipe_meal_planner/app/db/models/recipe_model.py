@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Text, Integer, ForeignKey, Numeric
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, Numeric, Computed, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from app.db.base_class import Base
 
 class Recipe(Base):
@@ -8,7 +8,7 @@ class Recipe(Base):
     description = Column(Text)
     instructions = Column(JSONB, nullable=False)
     prep_time_minutes = Column(Integer)
-    cook_time_minutes = Column(Integer)
+    cook_time_minutes = Column(Integer, index=True)
     servings = Column(Integer, server_default='4', nullable=False)
     difficulty_level = Column(String(20), server_default='medium', nullable=False)
     cuisine_type = Column(String(50), index=True)
@@ -17,14 +17,33 @@ class Recipe(Base):
     source_url = Column(String(500))
     spoonacular_id = Column(Integer, unique=True, index=True, nullable=True) # New column
     created_by_user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=True) # Added index=True as per example, though not strictly required by task
-    average_rating = Column(Numeric(3, 2), server_default='0.00', nullable=False)
+    # asdecimal=False on the Numeric columns: the API exposes them as floats, so read them as such
+    average_rating = Column(Numeric(3, 2, asdecimal=False), server_default='0.00', nullable=False)
     rating_count = Column(Integer, server_default='0', nullable=False)
-    calories = Column(Numeric(10, 2), nullable=True)
-    protein = Column(Numeric(10, 2), nullable=True)
-    carbohydrates = Column(Numeric(10, 2), nullable=True)
-    fat = Column(Numeric(10, 2), nullable=True)
+    calories = Column(Numeric(10, 2, asdecimal=False), nullable=True)
+    protein = Column(Numeric(10, 2, asdecimal=False), nullable=True)
+    carbohydrates = Column(Numeric(10, 2, asdecimal=False), nullable=True)
+    fat = Column(Numeric(10, 2, asdecimal=False), nullable=True)
+    # Full-text search document, maintained by Postgres: title matches rank above description matches.
+    # Deferred: only used in WHERE/ORDER BY, never loaded with the recipe.
+    search_tsv = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+    ))
 
     creator_user = relationship("User", back_populates="recipes_created")
     recipe_ingredients = relationship("RecipeIngredient", back_populates="recipe", cascade="all, delete-orphan")
     meal_plan_associations = relationship("MealPlanRecipe", back_populates="recipe", cascade="all, delete-orphan")
     user_save_associations = relationship("UserSavedRecipe", back_populates="recipe", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index('ix_recipes_search_tsv', 'search_tsv', postgresql_using='gin'),
+        # jsonb_path_ops: smaller than the default GIN opclass and enough for @> (tag containment)
+        Index('ix_recipes_dietary_tags', 'dietary_tags', postgresql_using='gin', postgresql_ops={'dietary_tags': 'jsonb_path_ops'}),
+        # Newest-first listing and its (created_at, id) cursor; btree indexes scan backwards too
+        Index('ix_recipes_created_at_id', 'created_at', 'id'),
+    )
@@ -1,14 +1,52 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from app.core.config import settings # Ensure this path is correct
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# DATABASE_URL stays a plain postgresql:// URL (Alembic runs on psycopg2);
+# the app talks to the same database through asyncpg.
+ASYNC_DATABASE_URL = make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+POOL_SIZE = 20
+# Longest warm_pool may hold up startup, e.g. while the database is unreachable
+WARM_POOL_TIMEOUT_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+
+engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True, pool_size=POOL_SIZE, max_overflow=40)
+# expire_on_commit=False: attribute access after a commit must not trigger implicit (sync) IO
+AsyncSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # Dependency for FastAPI routes
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def warm_pool(size: int = POOL_SIZE, timeout: float = WARM_POOL_TIMEOUT_SECONDS) -> None:
+    """
+    Opens `size` pool connections up front and returns them to the pool, so
+    the first requests after startup don't pay for connecting. Gives up after
+    `timeout` seconds.
+    """
+    async def _open_one() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    # All at once: checking out one at a time would reuse a single connection
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(*(_open_one() for _ in range(size)), return_exceptions=True),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        # Without this bound an unreachable database holds startup for asyncpg's 60 s connect timeout
+        logger.warning(f"Gave up pre-opening database connections after {timeout} s")
+        return
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        # Connections are still opened lazily on demand; don't block startup
+        logger.warning(f"Could not pre-open {len(failures)} of {size} database connections: {failures[0]!r}")
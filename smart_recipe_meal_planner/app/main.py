@@ -1,20 +1,39 @@
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.logging_config import setup_logging
-from app.api.v1 import api_v1_router # Import the router from app/api/v1/__init__.py
+from app.core.exception_handlers import register_exception_handlers
+from app.api.v1 import build_router # Builds the router from app/api/v1/endpoints
+from app.db.session import engine, warm_pool
+from app.api.v1.dependencies import close_spoonacular_client
 
 # Setup logging as per previous steps
 setup_logging(log_level="DEBUG" if settings.DEBUG else "INFO")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fill the connection pool before serving, so the first requests don't connect
+    await warm_pool()
+    yield
+    await close_spoonacular_client()
+    await engine.dispose()
+
+
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse, # orjson encodes responses faster than the stdlib json
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json", # Ensure API_V1_STR is defined in config
     debug=settings.DEBUG
 )
 
+register_exception_handlers(app)
+
 # Add CORS middleware if BACKEND_CORS_ORIGINS is set in config
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -26,21 +45,10 @@ if settings.BACKEND_CORS_ORIGINS:
     )
 
 # Include the V1 API router
-# This line connects the routes defined in app/api/v1/ (via recipes.router) to the main app.
-app.include_router(api_v1_router, prefix=settings.API_V1_STR)
+# This line connects the routes defined in app/api/v1/endpoints to the main app.
+app.include_router(build_router(), prefix=settings.API_V1_STR)
 
 @app.get("/")
 async def root():
     # Basic welcome message
     return {"message": f"Welcome to {settings.PROJECT_NAME} API. Visit /docs for API documentation."}
-
-# Placeholder for startup/shutdown events if needed later
-# @app.on_event("startup")
-# async def startup_event():
-#     # Initialize DB, etc.
-#     pass
-
-# @app.on_event("shutdown")
-# async def shutdown_event():
-#     # Clean up resources
-#     pass
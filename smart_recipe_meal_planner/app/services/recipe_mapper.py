@@ -1,18 +1,105 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 from app.models.recipe_schemas import InstructionStepCreate
 from pydantic import HttpUrl
 import logging
-from bs4 import BeautifulSoup # Add this import
+from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
+# Recipe nutrition fields and the Spoonacular nutrient names each is read
+# from, most preferred first.
+NUTRIENT_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "calories": ("Calories",),
+    "protein": ("Protein",),
+    "fat": ("Fat",),
+    "carbohydrates": ("Carbohydrates", "Net Carbohydrates"),
+}
+
+# Lowercased aliases per field, for matching names case-insensitively.
+_NUTRIENT_LOOKUP = {
+    field: tuple(alias.lower() for alias in aliases) for field, aliases in NUTRIENT_ALIASES.items()
+}
+_NUTRIENT_NAMES = frozenset(name for aliases in _NUTRIENT_LOOKUP.values() for name in aliases)
+
+
+class MappedIngredient(NamedTuple):
+    """One ingredient from a Spoonacular recipe, ready to be linked to a local Ingredient."""
+    name: str
+    quantity: float
+    unit: str
+    preparation_note: Optional[str]
+    category: Optional[str]
+    calories_per_unit: Optional[float]
+
+
+def _usable_ingredient_name(sp_ing: Dict[str, Any], spoonacular_id_val: int, title: str) -> Optional[str]:
+    """
+    Returns the lowercased name of a Spoonacular ingredient, or None (after
+    logging why) if the ingredient lacks a name, quantity or unit.
+    """
+    name = sp_ing.get("nameClean") or sp_ing.get("name")
+    if not name:
+        logger.warning(f"Skipping ingredient with no name for recipe {spoonacular_id_val} ('{title}').")
+        return None
+
+    if sp_ing.get("amount") is None or sp_ing.get("unit") is None:
+        logger.warning(f"Skipping ingredient '{name}' due to missing quantity/unit for recipe {spoonacular_id_val} ('{title}').")
+        return None
+
+    # Ingredients are stored (and logged from here on) under their lowercased name
+    return name.lower()
+
+
+def _build_ingredient(sp_ing: Dict[str, Any], name: str) -> MappedIngredient:
+    """
+    Maps one Spoonacular ingredient that passed _usable_ingredient_name.
+    """
+    quantity = sp_ing["amount"]
+    unit = sp_ing["unit"]
+
+    preparation_note = sp_ing.get("original") or sp_ing.get("originalString") or "; ".join(sp_ing.get("meta", []))
+
+    aisle = sp_ing.get("aisle")
+    # "Produce;Vegetables" -> "Produce"; aisles without a ';' are kept whole
+    category = aisle.partition(";")[0] if aisle else None
+
+    calories_per_unit = None
+    # Hypothetical: Spoonacular might provide nutrition per ingredient
+    # This part is speculative and needs checking against actual Spoonacular data
+    if "nutrition" in sp_ing and "nutrients" in sp_ing["nutrition"]:
+        for nutrient in sp_ing["nutrition"]["nutrients"]:
+            if nutrient.get("name", "").lower() == "calories" and "amount" in nutrient and "unit" in nutrient:
+                # This is tricky: amount might be for the sp_ing.get("amount")
+                # We need calories PER sp_ing.get("unit")
+                # If sp_ing.get("amount") is 1, then nutrient.get("amount") is calories_per_unit
+                # If sp_ing.get("amount") is > 1, needs division.
+                # This is a simplification; real calculation might be more involved.
+                # For now, let's assume if 'amount' (quantity) is 1.0, it's direct, else log/skip.
+                if float(quantity) == 1.0:
+                    calories_per_unit = float(nutrient["amount"])
+                else:
+                    # Log that calculation is needed or it's not directly per unit
+                    logger.info(f"Ingredient '{name}': Calorie data present for quantity {quantity} {unit} but not directly per single unit. Requires calculation.")
+                break
+
+    return MappedIngredient(
+        name=name,
+        quantity=float(quantity),
+        unit=unit,
+        preparation_note=preparation_note,
+        category=category,
+        calories_per_unit=calories_per_unit,
+    )
+
+
 def map_spoonacular_data_to_dict(
     spoonacular_data: Dict[str, Any],
     spoonacular_id_val: int
 ) -> Dict[str, Any]:
     """
     Maps recipe data from Spoonacular API (get_recipe_details response) to
-    a dictionary structured for creating a local recipe.
+    a dictionary structured for creating a local recipe. Its
+    "ingredients_data_temp" entry is a list of MappedIngredient.
     """
 
     title = spoonacular_data.get("title")
@@ -20,8 +107,9 @@ def map_spoonacular_data_to_dict(
         raise ValueError("Spoonacular data missing 'title'.")
 
     description = spoonacular_data.get("summary")
-    if description:
-        soup = BeautifulSoup(description, "html.parser")
+    # Summaries with no tags or entities are already plain text
+    if description and ("<" in description or "&" in description):
+        soup = BeautifulSoup(description, "lxml")
         description = soup.get_text()
 
     image_url_str = spoonacular_data.get("image")
@@ -60,6 +148,8 @@ def map_spoonacular_data_to_dict(
                         instructions_dict_list.append(instruction_model.model_dump())
                     except Exception as e:
                         logger.warning(f"Skipping invalid instruction step for recipe {spoonacular_id_val}: {step_data}. Error: {e}")
+                else:
+                    logger.warning(f"Skipping invalid instruction step for recipe {spoonacular_id_val}: {step_data}. Error: missing 'number' or 'step'")
     elif spoonacular_data.get("instructions"):
         plain_instructions_text = spoonacular_data.get("instructions")
         if isinstance(plain_instructions_text, str) and plain_instructions_text.strip():
@@ -85,55 +175,11 @@ def map_spoonacular_data_to_dict(
         "instructions_data": instructions_dict_list
     }
 
-    spoonacular_ingredients = spoonacular_data.get("extendedIngredients", [])
-    mapped_ingredients_temp: List[Dict[str, Any]] = []
-    for sp_ing in spoonacular_ingredients:
-        name = sp_ing.get("nameClean") or sp_ing.get("name")
-        if not name:
-            logger.warning(f"Skipping ingredient with no name for recipe {spoonacular_id_val} ('{title}').")
-            continue
-
-        quantity = sp_ing.get("amount")
-        unit = sp_ing.get("unit")
-
-        preparation_note = sp_ing.get("original") or sp_ing.get("originalString") or "; ".join(sp_ing.get("meta", []))
-
-        if quantity is None or unit is None:
-             logger.warning(f"Skipping ingredient '{name}' due to missing quantity/unit for recipe {spoonacular_id_val} ('{title}').")
-             continue
-
-        category = None
-        if sp_ing.get("aisle"):
-            category = sp_ing.get("aisle").split(";")[0]
-
-        calories_per_unit = None
-        # Hypothetical: Spoonacular might provide nutrition per ingredient
-        # This part is speculative and needs checking against actual Spoonacular data
-        if "nutrition" in sp_ing and "nutrients" in sp_ing["nutrition"]:
-            for nutrient in sp_ing["nutrition"]["nutrients"]:
-                if nutrient.get("name", "").lower() == "calories" and "amount" in nutrient and "unit" in nutrient:
-                    # This is tricky: amount might be for the sp_ing.get("amount")
-                    # We need calories PER sp_ing.get("unit")
-                    # If sp_ing.get("amount") is 1, then nutrient.get("amount") is calories_per_unit
-                    # If sp_ing.get("amount") is > 1, needs division.
-                    # This is a simplification; real calculation might be more involved.
-                    # For now, let's assume if 'amount' (quantity) is 1.0, it's direct, else log/skip.
-                    if float(quantity) == 1.0:
-                        calories_per_unit = float(nutrient["amount"])
-                    else:
-                        # Log that calculation is needed or it's not directly per unit
-                        logger.info(f"Ingredient '{name}': Calorie data present for quantity {quantity} {unit} but not directly per single unit. Requires calculation.")
-                    break
-
-        mapped_ingredients_temp.append({
-            "name": name.lower(),
-            "quantity": float(quantity),
-            "unit": unit,
-            "preparation_note": preparation_note,
-            "category": category,
-            "calories_per_unit": calories_per_unit
-        })
-
+    mapped_ingredients_temp: List[MappedIngredient] = [
+        _build_ingredient(sp_ing, name)
+        for sp_ing in spoonacular_data.get("extendedIngredients", [])
+        if (name := _usable_ingredient_name(sp_ing, spoonacular_id_val, title))
+    ]
     mapped_recipe_data["ingredients_data_temp"] = mapped_ingredients_temp
 
     if not instructions_dict_list:
@@ -146,33 +192,18 @@ def map_spoonacular_data_to_dict(
     nutrition_data = spoonacular_data.get("nutrition", {})
     nutrients = nutrition_data.get("nutrients", [])
 
-    calories = None
-    protein = None
-    fat = None
-    carbohydrates = None
-
+    # Amounts of the nutrients we map, by lowercased name
+    found: Dict[str, Any] = {}
     for nutrient in nutrients:
         name = nutrient.get("name", "").lower()
         amount = nutrient.get("amount")
         # unit = nutrient.get("unit") # Unit might be useful for validation later
+        if name in _NUTRIENT_NAMES and amount is not None:
+            found[name] = amount
 
-        if amount is None:
-            continue
-
-        if name == "calories":
-            calories = amount
-        elif name == "protein":
-            protein = amount
-        elif name == "fat":
-            fat = amount
-        elif name == "carbohydrates": # Spoonacular often uses "Net Carbohydrates" or just "Carbohydrates"
-            carbohydrates = amount
-        elif name == "net carbohydrates" and carbohydrates is None: # Prioritize "Carbohydrates" if available
-            carbohydrates = amount
-
-    mapped_recipe_data["calories"] = calories
-    mapped_recipe_data["protein"] = protein
-    mapped_recipe_data["fat"] = fat
-    mapped_recipe_data["carbohydrates"] = carbohydrates
+    # Spoonacular often uses "Net Carbohydrates" or just "Carbohydrates";
+    # the first alias present wins.
+    for field, aliases in _NUTRIENT_LOOKUP.items():
+        mapped_recipe_data[field] = next((found[alias] for alias in aliases if alias in found), None)
 
     return mapped_recipe_data
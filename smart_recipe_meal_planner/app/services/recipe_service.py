@@ -1,29 +1,186 @@
 
-import math
+import base64
 import logging # New
+from datetime import datetime
 from uuid import UUID # Changed
 from typing import List, Optional, Tuple, Dict, Any
 
-from sqlalchemy import or_, func # or_ added
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import or_, func, delete, insert, tuple_ # or_ added
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 from sqlalchemy.future import select
-from pydantic import parse_obj_as
+from pydantic import HttpUrl
 
 from app.db.models.recipe_model import Recipe as DBRecipe
 from app.db.models.ingredient_model import Ingredient as DBIngredient
 from app.db.models.recipe_ingredient_model import RecipeIngredient as DBRecipeIngredient
+from app.db.models.user_saved_recipe_model import UserSavedRecipe as DBUserSavedRecipe
 from app.models.recipe_schemas import RecipeCreate, RecipeUpdate, RecipePublic, InstructionStepPublic, InstructionStepCreate, RecipeIngredientLinkCreate # RecipeIngredientLinkCreate added
 from app.models.common_schemas import IngredientUsagePublic, RecipeIngredientLink
 
 # Added Spoonacular client and mapper imports
 from app.clients.spoonacular_client import SpoonacularClient, SpoonacularException, SpoonacularRateLimitException
-from app.services.recipe_mapper import map_spoonacular_data_to_dict
+from app.services.recipe_mapper import MappedIngredient, map_spoonacular_data_to_dict
 
 logger = logging.getLogger(__name__) # Added logger
 
+# Base queries for recipes mapped to RecipePublic, built once at import: they
+# load the ingredient links and their ingredients up front, and raise for any
+# other relationship a mapping touches, rather than lazy loading per row.
+# Statements are immutable, so each read extends one with its own
+# .where()/.order_by() without affecting other callers.
+# Add e.g. joinedload(DBRecipe.creator_user) here if the full user object is needed.
+_PUBLIC_RECIPES = select(DBRecipe).options(
+    joinedload(DBRecipe.recipe_ingredients).joinedload(DBRecipeIngredient.ingredient),
+    raiseload("*"),
+)
+# For pages of recipes: joining the links would repeat each recipe once per
+# ingredient and wrap the LIMIT in a subquery. One IN query for the page's
+# links (each joined to its ingredient) keeps the page query to one row per recipe.
+_PUBLIC_RECIPE_PAGE = select(DBRecipe).options(
+    selectinload(DBRecipe.recipe_ingredients).joinedload(DBRecipeIngredient.ingredient),
+    raiseload("*"),
+)
+
+
+class RecipeNotFoundException(Exception):
+    "Raised when the recipe to update or delete does not exist."
+    pass
+
+class RecipeForbiddenException(Exception):
+    "Raised when the user updating or deleting a recipe did not create it."
+    pass
+
+
+def _page_count(total_items: int, limit: int) -> int:
+    """Number of pages of `limit` items needed for `total_items`, in integer math."""
+    return (total_items + limit - 1) // limit if limit > 0 else 0
+
+def _encode_cursor(db_recipe: DBRecipe) -> str:
+    """Opaque cursor for the recipes listed after `db_recipe`."""
+    raw = f"{db_recipe.created_at.isoformat()}|{db_recipe.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        created_at, _, recipe_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+        return datetime.fromisoformat(created_at), UUID(recipe_id)
+    except ValueError as e: # binascii.Error and UnicodeDecodeError are ValueErrors too
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _to_public(
+    db_recipe: DBRecipe, user_has_saved: Optional[bool] = None, user_rating: Optional[int] = None
+) -> RecipePublic:
+    """
+    Maps a recipe loaded with its recipe_ingredients and their ingredients
+    to the API model.
+    """
+    recipe_ingredients_public = [
+        IngredientUsagePublic(
+            ingredient=RecipeIngredientLink(
+                id=ri.ingredient.id,
+                name=ri.ingredient.name,
+                category=ri.ingredient.category
+            ),
+            quantity=ri.quantity,
+            unit=ri.unit,
+            preparation_note=ri.preparation_note
+        )
+        # FK constraints should keep ingredient set; skip a link without one
+        for ri in db_recipe.recipe_ingredients
+        if ri.ingredient
+    ]
+
+    return RecipePublic(
+        id=db_recipe.id,
+        title=db_recipe.title,
+        description=db_recipe.description,
+        prep_time_minutes=db_recipe.prep_time_minutes,
+        cook_time_minutes=db_recipe.cook_time_minutes,
+        servings=db_recipe.servings,
+        difficulty_level=db_recipe.difficulty_level,
+        cuisine_type=db_recipe.cuisine_type,
+        dietary_tags=db_recipe.dietary_tags,
+        image_url=db_recipe.image_url,
+        source_url=db_recipe.source_url,
+        created_by_user_id=db_recipe.created_by_user_id,
+        average_rating=db_recipe.average_rating,
+        rating_count=db_recipe.rating_count,
+        created_at=db_recipe.created_at,
+        updated_at=db_recipe.updated_at,
+        # Instructions are stored as JSONB, one dict per step
+        instructions=[InstructionStepPublic.model_validate(step) for step in db_recipe.instructions],
+        recipe_ingredients=recipe_ingredients_public,
+        user_has_saved=user_has_saved,
+        user_rating=user_rating,
+        spoonacular_id=db_recipe.spoonacular_id,
+        calories=db_recipe.calories,
+        protein=db_recipe.protein,
+        carbohydrates=db_recipe.carbohydrates,
+        fat=db_recipe.fat
+    )
+
+
+def _to_public_unvalidated(db_recipe: DBRecipe) -> RecipePublic:
+    """
+    Like _to_public, but builds the models with model_construct. Rows were
+    validated when they were written, so this is only for read paths that
+    return many recipes. The URL strings are still wrapped in HttpUrl, so
+    serialization sees the types it expects.
+    """
+    return RecipePublic.model_construct(
+        id=db_recipe.id,
+        title=db_recipe.title,
+        description=db_recipe.description,
+        prep_time_minutes=db_recipe.prep_time_minutes,
+        cook_time_minutes=db_recipe.cook_time_minutes,
+        servings=db_recipe.servings,
+        difficulty_level=db_recipe.difficulty_level,
+        cuisine_type=db_recipe.cuisine_type,
+        dietary_tags=db_recipe.dietary_tags,
+        image_url=HttpUrl(db_recipe.image_url) if db_recipe.image_url else None,
+        source_url=HttpUrl(db_recipe.source_url) if db_recipe.source_url else None,
+        created_by_user_id=db_recipe.created_by_user_id,
+        average_rating=db_recipe.average_rating,
+        rating_count=db_recipe.rating_count,
+        created_at=db_recipe.created_at,
+        updated_at=db_recipe.updated_at,
+        instructions=[
+            InstructionStepPublic.model_construct(**step) for step in db_recipe.instructions
+        ],
+        recipe_ingredients=[
+            IngredientUsagePublic.model_construct(
+                ingredient=RecipeIngredientLink.model_construct(
+                    id=ri.ingredient.id,
+                    name=ri.ingredient.name,
+                    category=ri.ingredient.category
+                ),
+                quantity=ri.quantity,
+                unit=ri.unit,
+                preparation_note=ri.preparation_note
+            )
+            for ri in db_recipe.recipe_ingredients
+            if ri.ingredient
+        ],
+        user_has_saved=None,
+        user_rating=None,
+        spoonacular_id=db_recipe.spoonacular_id,
+        calories=db_recipe.calories,
+        protein=db_recipe.protein,
+        carbohydrates=db_recipe.carbohydrates,
+        fat=db_recipe.fat
+    )
+
+
 class RecipeService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, spoonacular_client: Optional[SpoonacularClient] = None):
         self.db = db
+        # Shared client injected by the API layer. When absent (or not configured),
+        # a client is created per call and closed afterwards.
+        self.spoonacular_client = spoonacular_client
 
     async def create_recipe(self, recipe_in: RecipeCreate, user_id: UUID) -> RecipePublic:
         # Convert instructions to list of dicts for JSONB storage
@@ -51,241 +208,158 @@ class RecipeService:
             fat=recipe_in.fat
         )
 
-        # Handle ingredients
-        for ingredient_link_in in recipe_in.ingredients:
-            # Assuming ingredient_id refers to an existing ingredient.
-            # A robust implementation might fetch DBIngredient here to ensure it exists.
-            db_recipe_ingredient = DBRecipeIngredient(
-                ingredient_id=ingredient_link_in.ingredient_id,
-                quantity=ingredient_link_in.quantity,
-                unit=ingredient_link_in.unit,
-                preparation_note=ingredient_link_in.preparation_note
-            )
-            db_recipe_obj.recipe_ingredients.append(db_recipe_ingredient)
-
         self.db.add(db_recipe_obj)
-        self.db.commit()
-        self.db.refresh(db_recipe_obj)
-
-        # Construct RecipePublic response
-        # Parse instructions from JSONB
-        parsed_instructions = parse_obj_as(List[InstructionStepPublic], db_recipe_obj.instructions)
-
-        # Map recipe ingredients to IngredientUsagePublic
-        recipe_ingredients_public = []
-        for ri in db_recipe_obj.recipe_ingredients:
-            # We need to fetch the ingredient details from the DBIngredient table
-            # This assumes the ingredient object is loaded/available via the relationship
-            # If not, a query might be needed: self.db.query(DBIngredient).get(ri.ingredient_id)
-            ingredient_db = self.db.query(DBIngredient).get(ri.ingredient_id)
-            if not ingredient_db:
-                # This case should ideally not happen if FK constraints are in place
-                # and ingredients are validated. Handling defensively.
-                # Or, raise an error. For now, skipping if ingredient not found.
-                continue
-
-            ingredient_link = RecipeIngredientLink(
-                id=ingredient_db.id,
-                name=ingredient_db.name,
-                category=ingredient_db.category
-            )
-            recipe_ingredients_public.append(
-                IngredientUsagePublic(
-                    ingredient=ingredient_link,
-                    quantity=float(ri.quantity), # Ensure conversion from Decimal
-                    unit=ri.unit,
-                    preparation_note=ri.preparation_note
-                )
-            )
-
-        return RecipePublic(
-            id=db_recipe_obj.id,
-            title=db_recipe_obj.title,
-            description=db_recipe_obj.description,
-            prep_time_minutes=db_recipe_obj.prep_time_minutes,
-            cook_time_minutes=db_recipe_obj.cook_time_minutes,
-            servings=db_recipe_obj.servings,
-            difficulty_level=db_recipe_obj.difficulty_level,
-            cuisine_type=db_recipe_obj.cuisine_type,
-            dietary_tags=db_recipe_obj.dietary_tags, # Assumes JSONB from DB is compatible
-            image_url=db_recipe_obj.image_url,
-            source_url=db_recipe_obj.source_url,
-            created_by_user_id=db_recipe_obj.created_by_user_id,
-            average_rating=float(db_recipe_obj.average_rating), # Ensure conversion
-            rating_count=db_recipe_obj.rating_count,
-            created_at=db_recipe_obj.created_at,
-            updated_at=db_recipe_obj.updated_at,
-            instructions=parsed_instructions,
-            recipe_ingredients=recipe_ingredients_public,
-            user_has_saved=None, # Not handled in this method
-            user_rating=None,    # Not handled in this method
-            spoonacular_id=db_recipe_obj.spoonacular_id, # Added spoonacular_id
-            # Add new nutritional fields to the response
-            calories=db_recipe_obj.calories,
-            protein=db_recipe_obj.protein,
-            carbohydrates=db_recipe_obj.carbohydrates,
-            fat=db_recipe_obj.fat
-        )
+        # The flush's INSERT ... RETURNING already fills the DB-side defaults (timestamps,
+        # rating) and the id the ingredient links need. Reload through get_recipe_by_id for
+        # the ingredient links and their ingredients, which an AsyncSession can't lazy-load,
+        # before committing: reading after the commit would open a second transaction just
+        # for this SELECT.
+        await self.db.flush()
+        # Assuming ingredient_id refers to an existing ingredient.
+        # A robust implementation might fetch DBIngredient here to ensure it exists.
+        await self._insert_ingredient_links(db_recipe_obj.id, recipe_in.ingredients)
+        recipe = await self.get_recipe_by_id(db_recipe_obj.id)
+        await self.db.commit()
+        return recipe
 
     async def get_recipes_list(
         self, page: int, limit: int, cuisine: Optional[str] = None,
         dietary_tags: Optional[List[str]] = None, max_cook_time: Optional[int] = None,
-        search_query: Optional[str] = None
+        search_query: Optional[str] = None, cursor: Optional[str] = None,
+        include_total: bool = True
     ) -> Tuple[List[RecipePublic], Dict[str, Any]]:
+        """
+        Lists recipes newest first, either by page number (with totals) or,
+        when `cursor` is given, as the `limit` recipes after that cursor.
+
+        Cursor pages cost the same however deep they are, while OFFSET walks
+        every skipped row. Each page's pagination carries the cursor for the next
+        one as "nextCursor" (unless searching, which orders by rank). Raises
+        ValueError for a malformed cursor or a cursor combined with search_query.
+
+        With include_total=False, page-number listings skip totalItems and
+        totalPages, which need every matching recipe counted.
+        """
         offset = (page - 1) * limit # type: ignore
 
-        # Base query for fetching recipes
-        stmt = (
-            select(DBRecipe)
-            .options(
-                joinedload(DBRecipe.recipe_ingredients).joinedload(DBRecipeIngredient.ingredient)
+        # Filters go into SQL, on indexed columns, for both the page and the count
+        filters = []
+        if cuisine:
+            filters.append(DBRecipe.cuisine_type == cuisine)
+        if dietary_tags:
+            # JSONB containment (@>), served by the GIN index on dietary_tags
+            filters.append(DBRecipe.dietary_tags.contains(dietary_tags))
+        if max_cook_time is not None:
+            filters.append(DBRecipe.cook_time_minutes <= max_cook_time)
+
+        # id breaks ties between recipes created in the same instant, so the
+        # order (and the cursor) is total. Served by ix_recipes_created_at_id.
+        ordering = [DBRecipe.created_at.desc(), DBRecipe.id.desc()]
+
+        # Full-text search over title and description, through the GIN-indexed search_tsv
+        if search_query:
+            if cursor is not None:
+                raise ValueError("Cursor pagination can't be combined with a search query.")
+            ts_query = func.websearch_to_tsquery('english', search_query)
+            filters.append(DBRecipe.search_tsv.op('@@')(ts_query))
+            ordering.insert(0, func.ts_rank(DBRecipe.search_tsv, ts_query).desc())
+
+        if cursor is not None:
+            last_created_at, last_id = _decode_cursor(cursor)
+            # One extra row tells whether another page follows, without counting
+            stmt = (
+                _PUBLIC_RECIPE_PAGE
+                .where(*filters, tuple_(DBRecipe.created_at, DBRecipe.id) < tuple_(last_created_at, last_id))
+                .order_by(*ordering)
+                .limit(limit + 1)
             )
-            .order_by(DBRecipe.created_at.desc()) # Consistent ordering
-        )
-
-        # Base count query
-        count_stmt = select(func.count()).select_from(DBRecipe)
-
-        # TODO: Apply filters to both stmt and count_stmt based on cuisine, dietary_tags, etc.
-        # Example for cuisine (if it's a direct match):
-        # if cuisine:
-        #     stmt = stmt.where(DBRecipe.cuisine_type == cuisine)
-        #     count_stmt = count_stmt.where(DBRecipe.cuisine_type == cuisine)
-        # For dietary_tags (assuming JSONB contains a list of strings):
-        # if dietary_tags:
-        #     stmt = stmt.where(DBRecipe.dietary_tags.contains(dietary_tags)) # Adjust based on actual JSON structure
-        #     count_stmt = count_stmt.where(DBRecipe.dietary_tags.contains(dietary_tags))
-        # For max_cook_time:
-        # if max_cook_time is not None:
-        #     stmt = stmt.where(DBRecipe.cook_time_minutes <= max_cook_time)
-        #     count_stmt = count_stmt.where(DBRecipe.cook_time_minutes <= max_cook_time)
-        # For search_query (e.g., search in title and description):
-        # if search_query:
-        #     search_filter = or_(
-        #         DBRecipe.title.ilike(f"%{search_query}%"),
-        #         DBRecipe.description.ilike(f"%{search_query}%")
-        #     )
-        #     stmt = stmt.where(search_filter)
-        #     count_stmt = count_stmt.where(search_filter)
-
-        # Apply pagination to the main query
-        stmt = stmt.offset(offset).limit(limit)
-
-        # Execute queries
-        # Note: For async, ensure your DB driver supports async operations.
-        # Here, self.db.execute is assumed to be handled by FastAPI's async session management.
-        db_recipes_result = self.db.execute(stmt)
-        db_recipes = db_recipes_result.scalars().all()
-
-        total_items_result = self.db.execute(count_stmt)
-        total_items = total_items_result.scalar_one()
-
-        # Convert DBRecipe objects to RecipePublic
-        recipes_public_list: List[RecipePublic] = []
-        for db_recipe in db_recipes:
-            parsed_instructions = parse_obj_as(List[InstructionStepPublic], db_recipe.instructions)
-            recipe_ingredients_public = []
-            for ri in db_recipe.recipe_ingredients:
-                if ri.ingredient:
-                    ingredient_link = RecipeIngredientLink(
-                        id=ri.ingredient.id,
-                        name=ri.ingredient.name,
-                        category=ri.ingredient.category
-                    )
-                    recipe_ingredients_public.append(
-                        IngredientUsagePublic(
-                            ingredient=ingredient_link,
-                            quantity=float(ri.quantity),
-                            unit=ri.unit,
-                            preparation_note=ri.preparation_note
-                        )
-                    )
-
-            recipes_public_list.append(
-                RecipePublic(
-                    id=db_recipe.id,
-                    title=db_recipe.title,
-                    description=db_recipe.description,
-                    prep_time_minutes=db_recipe.prep_time_minutes,
-                    cook_time_minutes=db_recipe.cook_time_minutes,
-                    servings=db_recipe.servings,
-                    difficulty_level=db_recipe.difficulty_level,
-                    cuisine_type=db_recipe.cuisine_type,
-                    dietary_tags=db_recipe.dietary_tags,
-                    image_url=db_recipe.image_url,
-                    source_url=db_recipe.source_url,
-                    created_by_user_id=db_recipe.created_by_user_id,
-                    average_rating=float(db_recipe.average_rating),
-                    rating_count=db_recipe.rating_count,
-                    created_at=db_recipe.created_at,
-                    updated_at=db_recipe.updated_at,
-                    instructions=parsed_instructions,
-                    recipe_ingredients=recipe_ingredients_public,
-                    user_has_saved=None, # Not determined in this list view
-                    user_rating=None,    # Not determined in this list view
-                    spoonacular_id=db_recipe.spoonacular_id, # Added spoonacular_id
-                    # Add new nutritional fields to the response
-                    calories=db_recipe.calories,
-                    protein=db_recipe.protein,
-                    carbohydrates=db_recipe.carbohydrates,
-                    fat=db_recipe.fat
-                )
+            db_recipes = list((await self.db.execute(stmt)).scalars())
+            has_next = len(db_recipes) > limit
+            db_recipes = db_recipes[:limit]
+            pagination_meta = {
+                "hasNext": has_next,
+                "nextCursor": _encode_cursor(db_recipes[-1]) if has_next else None,
+                "itemsPerPage": limit,
+            }
+        elif include_total:
+            # The window count is taken over all matching recipes before LIMIT,
+            # so each row also carries the total.
+            stmt = (
+                _PUBLIC_RECIPE_PAGE
+                .add_columns(func.count().over().label("total"))
+                .where(*filters)
+                .order_by(*ordering)
+                .offset(offset)
+                .limit(limit)
+            )
+            rows = (await self.db.execute(stmt)).all()
+            db_recipes = [row.Recipe for row in rows]
+
+            if rows:
+                total_items = rows[0].total
+            elif offset:
+                # A page past the end has no rows to carry the total; count separately
+                count_stmt = select(func.count()).select_from(DBRecipe).where(*filters)
+                total_items = (await self.db.execute(count_stmt)).scalar_one()
+            else:
+                total_items = 0
+
+            # Pagination metadata
+            total_pages = _page_count(total_items, limit)
+            has_next = page < total_pages
+            pagination_meta = {
+                "currentPage": page,
+                "totalPages": total_pages,
+                "totalItems": total_items,
+                "hasNext": has_next,
+                "hasPrevious": page > 1,
+                "itemsPerPage": limit,
+            }
+        else:
+            # Without totals nothing has to look at every matching recipe; one
+            # extra row tells whether another page follows.
+            stmt = (
+                _PUBLIC_RECIPE_PAGE
+                .where(*filters)
+                .order_by(*ordering)
+                .offset(offset)
+                .limit(limit + 1)
+            )
+            db_recipes = list((await self.db.execute(stmt)).scalars())
+            has_next = len(db_recipes) > limit
+            db_recipes = db_recipes[:limit]
+            pagination_meta = {
+                "currentPage": page,
+                "hasNext": has_next,
+                "hasPrevious": page > 1,
+                "itemsPerPage": limit,
+            }
+
+        if cursor is None:
+            # Lets clients continue from here with cursor pages
+            pagination_meta["nextCursor"] = (
+                _encode_cursor(db_recipes[-1]) if has_next and db_recipes and not search_query else None
             )
 
-        # Pagination metadata
-        total_pages = math.ceil(total_items / limit) if limit > 0 else 0
-        pagination_meta = {
-            "currentPage": page,
-            "totalPages": total_pages,
-            "totalItems": total_items,
-            "hasNext": page < total_pages,
-            "hasPrevious": page > 1,
-            "itemsPerPage": limit
-        }
+        # Convert DBRecipe objects to RecipePublic
+        # user_has_saved / user_rating are not determined in this list view
+        recipes_public_list: List[RecipePublic] = [_to_public_unvalidated(db_recipe) for db_recipe in db_recipes]
 
         return recipes_public_list, pagination_meta
 
     async def get_recipe_by_id(self, recipe_id: UUID, user_id: Optional[UUID] = None) -> Optional[RecipePublic]:
         # Construct query with eager loading
         stmt = (
-            select(DBRecipe)
+            _PUBLIC_RECIPES
             .where(DBRecipe.id == recipe_id)
-            .options(
-                joinedload(DBRecipe.recipe_ingredients).joinedload(DBRecipeIngredient.ingredient),
-                # joinedload(DBRecipe.creator_user) # Uncomment if full user object needed
-            )
+            # Overwrite a copy already in the session (e.g. one update_recipe just committed)
+            .execution_options(populate_existing=True)
         )
-        db_recipe = self.db.execute(stmt).scalar_one_or_none()
+        db_recipe = (await self.db.execute(stmt)).unique().scalar_one_or_none()
 
         if db_recipe is None:
             return None
 
-        # Parse instructions from JSONB
-        parsed_instructions = parse_obj_as(List[InstructionStepPublic], db_recipe.instructions)
-
-        # Map recipe ingredients to IngredientUsagePublic
-        recipe_ingredients_public = []
-        for ri in db_recipe.recipe_ingredients:
-            if ri.ingredient: # Check if ingredient was successfully loaded
-                ingredient_link = RecipeIngredientLink(
-                    id=ri.ingredient.id,
-                    name=ri.ingredient.name,
-                    category=ri.ingredient.category
-                )
-                recipe_ingredients_public.append(
-                    IngredientUsagePublic(
-                        ingredient=ingredient_link,
-                        quantity=float(ri.quantity), # Ensure conversion from Decimal
-                        unit=ri.unit,
-                        preparation_note=ri.preparation_note
-                    )
-                )
-            else:
-                # Handle cases where an ingredient might be missing, though FK constraints should prevent this
-                # Log this situation if it occurs
-                pass
-
-
         # TODO: Implement logic for user_has_saved and user_rating based on user_id if provided
         # For now, defaulting to None as per current scope
         user_has_saved_status = None
@@ -301,36 +375,13 @@ class RecipeService:
         #     pass
 
 
-        return RecipePublic(
-            id=db_recipe.id,
-            title=db_recipe.title,
-            description=db_recipe.description,
-            prep_time_minutes=db_recipe.prep_time_minutes,
-            cook_time_minutes=db_recipe.cook_time_minutes,
-            servings=db_recipe.servings,
-            difficulty_level=db_recipe.difficulty_level,
-            cuisine_type=db_recipe.cuisine_type,
-            dietary_tags=db_recipe.dietary_tags,
-            image_url=db_recipe.image_url,
-            source_url=db_recipe.source_url,
-            created_by_user_id=db_recipe.created_by_user_id,
-            average_rating=float(db_recipe.average_rating),
-            rating_count=db_recipe.rating_count,
-            created_at=db_recipe.created_at,
-            updated_at=db_recipe.updated_at,
-            instructions=parsed_instructions,
-            recipe_ingredients=recipe_ingredients_public,
-            user_has_saved=user_has_saved_status,
-            user_rating=user_specific_rating,
-            spoonacular_id=db_recipe.spoonacular_id, # Added spoonacular_id
-            # Add new nutritional fields to the response
-            calories=db_recipe.calories,
-            protein=db_recipe.protein,
-            carbohydrates=db_recipe.carbohydrates,
-            fat=db_recipe.fat
-        )
+        return _to_public(db_recipe, user_has_saved=user_has_saved_status, user_rating=user_specific_rating)
 
-    async def update_recipe(self, recipe_id: UUID, recipe_in: RecipeUpdate, user_id: UUID) -> Optional[RecipePublic]:
+    async def update_recipe(self, recipe_id: UUID, recipe_in: RecipeUpdate, user_id: UUID) -> RecipePublic:
+        """
+        Raises RecipeNotFoundException / RecipeForbiddenException, so callers
+        don't need to look the recipe up first.
+        """
         # Fetch the recipe with its ingredients
         stmt = (
             select(DBRecipe)
@@ -339,15 +390,14 @@ class RecipeService:
                 joinedload(DBRecipe.recipe_ingredients).joinedload(DBRecipeIngredient.ingredient)
             )
         )
-        db_recipe = self.db.execute(stmt).scalar_one_or_none()
+        db_recipe = (await self.db.execute(stmt)).unique().scalar_one_or_none()
 
         if db_recipe is None:
-            return None
+            raise RecipeNotFoundException(f"Recipe {recipe_id} not found")
 
         # Authorization check
         if db_recipe.created_by_user_id != user_id:
-            # Optionally, raise HTTPException(status_code=403, detail="Not authorized to update this recipe")
-            return None
+            raise RecipeForbiddenException(f"Not authorized to update recipe {recipe_id}")
 
         # Update basic fields
         update_data = recipe_in.model_dump(exclude_unset=True)
@@ -363,185 +413,189 @@ class RecipeService:
             db_recipe.instructions = [instr.model_dump() for instr in recipe_in.instructions]
 
         # Update ingredients if provided
+        added_links: List[RecipeIngredientLinkCreate] = []
         if recipe_in.ingredients is not None:
-            # Clear existing ingredients.
-            # The 'all, delete-orphan' cascade should handle deletion from the DB.
-            db_recipe.recipe_ingredients.clear()
-            # Or, explicit deletion:
-            # for old_recipe_ingredient in list(db_recipe.recipe_ingredients): # Iterate over a copy
-            #    self.db.delete(old_recipe_ingredient)
-            # self.db.flush() # Ensure deletes are processed before adds if not using clear()
-
-            # Add new ingredients
-            for ingredient_link_in in recipe_in.ingredients:
-                # It's good practice to ensure the ingredient exists, though not strictly required by this task
-                # ingredient_check = self.db.query(DBIngredient).get(ingredient_link_in.ingredient_id)
-                # if not ingredient_check:
-                #     # Handle missing ingredient error, e.g., raise HTTPException
-                #     continue
-                new_db_recipe_ingredient = DBRecipeIngredient(
-                    ingredient_id=ingredient_link_in.ingredient_id,
-                    quantity=ingredient_link_in.quantity,
-                    unit=ingredient_link_in.unit,
-                    preparation_note=ingredient_link_in.preparation_note
-                    # recipe_id=db_recipe.id # Not needed if appended to relationship
-                )
-                db_recipe.recipe_ingredients.append(new_db_recipe_ingredient)
+            # Diff against the current links by ingredient, so unchanged links aren't
+            # rewritten. Removing and re-adding a link also can't work: the unit of work
+            # flushes inserts before deletes, which trips uq_recipe_ingredient.
+            existing_links = {ri.ingredient_id: ri for ri in db_recipe.recipe_ingredients}
+            new_links = {link_in.ingredient_id: link_in for link_in in recipe_in.ingredients}
+
+            for ingredient_id, db_link in existing_links.items():
+                if ingredient_id not in new_links:
+                    # 'all, delete-orphan' cascade deletes the row on flush
+                    db_recipe.recipe_ingredients.remove(db_link)
+
+            for ingredient_id, link_in in new_links.items():
+                db_link = existing_links.get(ingredient_id)
+                if db_link is None:
+                    added_links.append(link_in)
+                elif (db_link.quantity, db_link.unit, db_link.preparation_note) != (
+                    link_in.quantity, link_in.unit, link_in.preparation_note
+                ):
+                    db_link.quantity = link_in.quantity
+                    db_link.unit = link_in.unit
+                    db_link.preparation_note = link_in.preparation_note
 
         self.db.add(db_recipe) # Add to session to track changes
-        self.db.commit()
-        self.db.refresh(db_recipe) # Refresh to get updated state, including new ingredient IDs if any
-
-        # Re-fetch the ingredient details for the response if they were changed.
-        # The refresh above should update scalar properties and potentially collections,
-        # but nested relationships (ingredient details within recipe_ingredients) might need care.
-        # A simple way is to call get_recipe_by_id, but this is an extra DB hit.
-        # For now, we will reconstruct it manually, assuming refresh populated enough.
-        # If ingredient details were not part of the refresh of db_recipe.recipe_ingredients,
-        # we might need to explicitly load them or use the get_recipe_by_id method.
-        # Let's try to reconstruct manually assuming relationships are okay after refresh.
-
-        parsed_instructions = parse_obj_as(List[InstructionStepPublic], db_recipe.instructions)
-
-        recipe_ingredients_public = []
-        for ri in db_recipe.recipe_ingredients:
-            # After refresh, ri.ingredient might not be loaded if we only loaded it initially.
-            # A full reload of the recipe or specific reloading of these relationships might be needed.
-            # For simplicity, let's assume we need to fetch ingredient details if not present.
-            # This is similar to create_recipe's ingredient fetching logic.
-            ingredient_details = ri.ingredient
-            if not ingredient_details: # If not eagerly loaded or refreshed properly
-                 ingredient_details = self.db.query(DBIngredient).get(ri.ingredient_id)
-
-            if ingredient_details:
-                ingredient_link = RecipeIngredientLink(
-                    id=ingredient_details.id,
-                    name=ingredient_details.name,
-                    category=ingredient_details.category
-                )
-                recipe_ingredients_public.append(
-                    IngredientUsagePublic(
-                        ingredient=ingredient_link,
-                        quantity=float(ri.quantity),
-                        unit=ri.unit,
-                        preparation_note=ri.preparation_note
-                    )
-                )
-            # else: handle missing ingredient if necessary, though FK should prevent this state.
-
-        return RecipePublic(
-            id=db_recipe.id,
-            title=db_recipe.title,
-            description=db_recipe.description,
-            prep_time_minutes=db_recipe.prep_time_minutes,
-            cook_time_minutes=db_recipe.cook_time_minutes,
-            servings=db_recipe.servings,
-            difficulty_level=db_recipe.difficulty_level,
-            cuisine_type=db_recipe.cuisine_type,
-            dietary_tags=db_recipe.dietary_tags,
-            image_url=db_recipe.image_url,
-            source_url=db_recipe.source_url,
-            created_by_user_id=db_recipe.created_by_user_id,
-            average_rating=float(db_recipe.average_rating),
-            rating_count=db_recipe.rating_count,
-            created_at=db_recipe.created_at,
-            updated_at=db_recipe.updated_at, # Should be updated by DB timestamp trigger or manually
-            instructions=parsed_instructions,
-            recipe_ingredients=recipe_ingredients_public,
-            user_has_saved=None, # TODO: Implement if needed
-            user_rating=None,    # TODO: Implement if needed
-            spoonacular_id=db_recipe.spoonacular_id, # Added spoonacular_id
-            # Add new nutritional fields to the response
-            calories=db_recipe.calories,
-            protein=db_recipe.protein,
-            carbohydrates=db_recipe.carbohydrates,
-            fat=db_recipe.fat
+        await self.db.flush()
+        await self._insert_ingredient_links(db_recipe.id, added_links)
+
+        # Reload through get_recipe_by_id, still inside the transaction: it eager-loads the
+        # new ingredient links and their ingredients in one query, which an AsyncSession
+        # can't lazy-load here, and picks up the DB-side updated_at.
+        recipe = await self.get_recipe_by_id(db_recipe.id, user_id=user_id)
+        await self.db.commit()
+        return recipe
+
+    async def _insert_ingredient_links(self, recipe_id: UUID, links: List[RecipeIngredientLinkCreate]) -> None:
+        """
+        Inserts the links in one executemany. Appending DBRecipeIngredient objects
+        instead makes the flush send one INSERT per link, since each has to
+        RETURNING its timestamps. The links are not added to the session; callers
+        reload the recipe through get_recipe_by_id.
+        """
+        if not links:
+            return
+        await self.db.execute(
+            insert(DBRecipeIngredient),
+            [
+                {
+                    "recipe_id": recipe_id,
+                    "ingredient_id": link.ingredient_id,
+                    "quantity": link.quantity,
+                    "unit": link.unit,
+                    "preparation_note": link.preparation_note,
+                }
+                for link in links
+            ],
         )
 
-    async def delete_recipe(self, recipe_id: UUID, user_id: UUID) -> bool:
-        stmt = select(DBRecipe).where(DBRecipe.id == recipe_id)
-        # For async, ensure self.db.execute is compatible.
-        # result = await self.db.execute(stmt) # type: ignore
-        # db_recipe = result.scalar_one_or_none() # type: ignore
-        db_recipe = self.db.execute(stmt).scalar_one_or_none() # type: ignore
+    async def delete_recipe(self, recipe_id: UUID, user_id: UUID) -> None:
+        """
+        Deletes the recipe if user_id created it, in a single DELETE. The
+        database cascades to its ingredient links, meal plan entries and saves.
 
+        Raises RecipeNotFoundException / RecipeForbiddenException.
+        """
+        stmt = (
+            delete(DBRecipe)
+            .where(DBRecipe.id == recipe_id, DBRecipe.created_by_user_id == user_id)
+            .returning(DBRecipe.id)
+        )
+        deleted_id = (await self.db.execute(stmt)).scalar_one_or_none()
 
-        if db_recipe is None:
-            return False # Recipe not found
-
-        # Authorization check
-        if db_recipe.created_by_user_id != user_id:
-            # Optionally, raise HTTPException(status_code=403, detail="Not authorized to delete this recipe")
-            return False # User is not the owner
-
-        # self.db.delete is synchronous by default with traditional SQLAlchemy,
-        # ensure it's called correctly in an async context (e.g. via await self.db.run_sync(self.db.delete, db_recipe) or similar
-        # if using greenlet/asyncpg for true async. For this example, assuming direct compatibility or simplified async handling.
-        self.db.delete(db_recipe)
-        self.db.commit()
-        # await self.db.delete(db_recipe) # If using an async session method
-        # await self.db.commit()          # If using an async session method
+        if deleted_id is None:
+            # Nothing deleted: only now check whether the recipe exists at all
+            exists = (await self.db.execute(select(DBRecipe.id).where(DBRecipe.id == recipe_id))).scalar_one_or_none()
+            if exists is None:
+                raise RecipeNotFoundException(f"Recipe {recipe_id} not found")
+            raise RecipeForbiddenException(f"Not authorized to delete recipe {recipe_id}")
 
-        return True
+        await self.db.commit()
 
     async def add_recipe_to_favorites(self, recipe_id: UUID, user_id: UUID) -> Any:
         # Placeholder: return would be RecipePublic
-        print(f"RecipeService: add_recipe_to_favorites called for recipe_id: {recipe_id}, user_id: {user_id}")
+        logger.debug("RecipeService: add_recipe_to_favorites called for recipe_id: %s, user_id: %s", recipe_id, user_id)
         raise NotImplementedError("RecipeService: add_recipe_to_favorites not implemented")
 
     async def remove_recipe_from_favorites(self, recipe_id: UUID, user_id: UUID) -> bool:
-        print(f"RecipeService: remove_recipe_from_favorites called for recipe_id: {recipe_id}, user_id: {user_id}")
+        logger.debug("RecipeService: remove_recipe_from_favorites called for recipe_id: %s, user_id: %s", recipe_id, user_id)
         raise NotImplementedError("RecipeService: remove_recipe_from_favorites not implemented")
 
+    async def add_recipes_to_favorites(self, recipe_ids: List[UUID], user_id: UUID) -> int:
+        """
+        Saves several recipes for a user in one INSERT. Recipes the user has
+        already saved are skipped. Returns how many were newly saved.
+        """
+        if not recipe_ids:
+            return 0
+        stmt = (
+            pg_insert(DBUserSavedRecipe)
+            .values([{"user_id": user_id, "recipe_id": recipe_id} for recipe_id in dict.fromkeys(recipe_ids)])
+            .on_conflict_do_nothing(constraint="uq_user_saved_recipe")
+            .returning(DBUserSavedRecipe.recipe_id)
+        )
+        saved = (await self.db.execute(stmt)).scalars().all()
+        await self.db.commit()
+        return len(saved)
+
+    async def remove_recipes_from_favorites(self, recipe_ids: List[UUID], user_id: UUID) -> int:
+        """
+        Unsaves several recipes for a user in one DELETE. Returns how many
+        were removed.
+        """
+        if not recipe_ids:
+            return 0
+        stmt = (
+            delete(DBUserSavedRecipe)
+            .where(DBUserSavedRecipe.user_id == user_id, DBUserSavedRecipe.recipe_id.in_(recipe_ids))
+            .returning(DBUserSavedRecipe.recipe_id)
+        )
+        removed = (await self.db.execute(stmt)).scalars().all()
+        await self.db.commit()
+        return len(removed)
+
     async def rate_recipe(self, recipe_id: UUID, rating_in: Any, user_id: UUID) -> Any:
         # Placeholder: rating_in would be RecipeRatingCreate, return would be RecipeRatingPublic
-        print(f"RecipeService: rate_recipe called for recipe_id: {recipe_id}, user_id: {user_id} with rating: {rating_in}")
+        logger.debug("RecipeService: rate_recipe called for recipe_id: %s, user_id: %s with rating: %s", recipe_id, user_id, rating_in)
         raise NotImplementedError("RecipeService: rate_recipe not implemented")
 
     async def get_ratings_for_recipe(self, recipe_id: UUID) -> List[Any]:
         # Placeholder: return would be List[RecipeRatingPublic]
-        print(f"RecipeService: get_ratings_for_recipe called for recipe_id: {recipe_id}")
+        logger.debug("RecipeService: get_ratings_for_recipe called for recipe_id: %s", recipe_id)
         raise NotImplementedError("RecipeService: get_ratings_for_recipe not implemented")
 
-    async def _get_or_create_ingredient(
-        self,
-        name: str,
-        category: Optional[str] = "Unknown",
-        calories_per_unit: Optional[float] = None
-    ) -> DBIngredient:
-        normalized_name = name.strip().lower()
-        stmt = select(DBIngredient).where(func.lower(DBIngredient.name) == normalized_name)
-        existing_ingredient = self.db.execute(stmt).scalars().first()
-        if existing_ingredient:
-            return existing_ingredient
-        else:
-            # Use provided category, defaulting to "Unknown" if None
-            ingredient_category = category if category is not None else "Unknown"
-            new_ingredient = DBIngredient(
-                name=name.strip(),
-                category=ingredient_category,
-                calories_per_unit=calories_per_unit
+    async def _get_or_create_ingredients(self, ingredients: List[MappedIngredient]) -> Dict[str, DBIngredient]:
+        """
+        Returns the local Ingredient for each mapped ingredient, keyed by
+        lowercased name, creating the missing ones. One SELECT finds the
+        existing ingredients and one INSERT adds the rest, however many the
+        recipe has.
+        """
+        # First occurrence of each name wins, as with one-by-one creation
+        wanted: Dict[str, MappedIngredient] = {}
+        for ing in ingredients:
+            wanted.setdefault(ing.name.strip().lower(), ing)
+        if not wanted:
+            return {}
+
+        stmt = select(DBIngredient).where(func.lower(DBIngredient.name).in_(list(wanted)))
+        found = {db_ing.name.lower(): db_ing for db_ing in (await self.db.execute(stmt)).scalars()}
+
+        missing = [name for name in wanted if name not in found]
+        if missing:
+            insert_stmt = (
+                pg_insert(DBIngredient)
+                .values([
+                    {
+                        "name": wanted[name].name.strip(),
+                        # Use provided category, defaulting to "Unknown" if None
+                        "category": wanted[name].category if wanted[name].category is not None else "Unknown",
+                        "calories_per_unit": wanted[name].calories_per_unit,
+                    }
+                    for name in missing
+                ])
+                # Another import may have just created some of them
+                .on_conflict_do_nothing(index_elements=[DBIngredient.name])
+                .returning(DBIngredient)
             )
-            self.db.add(new_ingredient)
-            try:
-                self.db.commit()
-                self.db.refresh(new_ingredient)
-                return new_ingredient
-            except Exception as e:
-                self.db.rollback()
-                stmt_retry = select(DBIngredient).where(func.lower(DBIngredient.name) == normalized_name)
-                existing_ingredient_retry = self.db.execute(stmt_retry).scalars().first()
-                if existing_ingredient_retry:
-                    return existing_ingredient_retry
-                logger.error(f"Error creating ingredient '{name}': {e}")
-                raise
+            created = (await self.db.execute(insert_stmt)).scalars().all()
+            found.update((db_ing.name.lower(), db_ing) for db_ing in created)
+
+            lost_races = [name for name in missing if name not in found]
+            if lost_races:
+                stmt = select(DBIngredient).where(func.lower(DBIngredient.name).in_(lost_races))
+                found.update((db_ing.name.lower(), db_ing) for db_ing in (await self.db.execute(stmt)).scalars())
+
+        return found
 
     async def search_external_recipes(
         self, query: str, page: int = 1, limit: int = 10
     ) -> Dict[str, Any]:
         client = None
         try:
-            client = SpoonacularClient()
+            client = self.spoonacular_client or SpoonacularClient()
             offset = (page - 1) * limit
             spoonacular_response = await client.search_recipes(
                 query=query, offset=offset, number=limit,
@@ -558,7 +612,7 @@ class RecipeService:
             # Re-raise as a more generic exception or a custom one if defined for service layer
             raise Exception(f"Spoonacular client configuration error: {e}") from e
         finally:
-            if client:
+            if client and client is not self.spoonacular_client:
                 await client.close()
 
         results = spoonacular_response.get("results", [])
@@ -575,7 +629,7 @@ class RecipeService:
                 "servings": res.get("servings")
             })
 
-        total_pages = math.ceil(total_items / limit) if limit > 0 else 0
+        total_pages = _page_count(total_items, limit)
         pagination_meta = {
             "currentPage": page,
             "totalPages": total_pages,
@@ -590,7 +644,7 @@ class RecipeService:
     async def import_recipe_from_spoonacular(self, spoonacular_id: int, user_id: UUID) -> RecipePublic:
         # Check if recipe already exists by spoonacular_id
         stmt_check = select(DBRecipe).where(DBRecipe.spoonacular_id == spoonacular_id)
-        existing_recipe = self.db.execute(stmt_check).scalars().first()
+        existing_recipe = (await self.db.execute(stmt_check)).scalars().first()
         if existing_recipe:
             logger.info(f"Recipe with Spoonacular ID {spoonacular_id} (local ID {existing_recipe.id}) already exists.")
             # Return existing recipe, ensuring it's the full public model
@@ -598,7 +652,7 @@ class RecipeService:
 
         client = None
         try:
-            client = SpoonacularClient()
+            client = self.spoonacular_client or SpoonacularClient()
             spoonacular_recipe_data = await client.get_recipe_details(spoonacular_id, include_nutrition=True)
         except SpoonacularRateLimitException as e:
             logger.error(f"Spoonacular API rate limit for recipe {spoonacular_id}: {e}")
@@ -610,7 +664,7 @@ class RecipeService:
             logger.error(f"SpoonacularClient config error: {e}")
             raise Exception(f"Spoonacular client configuration error: {e}") from e
         finally:
-            if client:
+            if client and client is not self.spoonacular_client:
                 await client.close()
 
         try:
@@ -618,7 +672,8 @@ class RecipeService:
             mapped_data = map_spoonacular_data_to_dict(spoonacular_recipe_data, spoonacular_id)
         except ValueError as e: # Catch specific mapping errors
             logger.error(f"Mapping error for Spoonacular recipe {spoonacular_id}: {e}")
-            raise Exception(f"Error processing recipe data: {e}") from e
+            # Still a ValueError, so the endpoint answers 422 like the other unusable-data cases
+            raise ValueError(f"Error processing recipe data: {e}") from e
 
         # Ensure ingredients are present after mapping
         if not mapped_data.get("ingredients_data_temp"):
@@ -627,27 +682,23 @@ class RecipeService:
             # Depending on policy, you might raise an error or proceed without ingredients
             raise ValueError(f"Recipe {spoonacular_id} ('{mapped_data.get('title')}'): No ingredients mapped.")
 
-        # Process ingredients: get or create local DBIngredient, then prepare RecipeIngredientLinkCreate
-        recipe_ingredient_links_create: List[RecipeIngredientLinkCreate] = []
-        for ing_data in mapped_data["ingredients_data_temp"]:
-            try:
-                ingredient_db_obj = await self._get_or_create_ingredient(
-                    name=ing_data["name"],
-                    category=ing_data.get("category"), # Pass category from mapped_data
-                    calories_per_unit=ing_data.get("calories_per_unit") # Pass calories_per_unit
-                )
-                recipe_ingredient_links_create.append(
-                    RecipeIngredientLinkCreate(
-                        ingredient_id=ingredient_db_obj.id, # Use the ID from the DB object
-                        quantity=ing_data["quantity"],
-                        unit=ing_data["unit"],
-                        preparation_note=ing_data.get("preparation_note") # Ensure this is optional
-                    )
-                )
-            except Exception as e:
-                # Log and re-raise or collect errors to decide if recipe import should fail
-                logger.error(f"Failed to process or link ingredient '{ing_data['name']}' for Spoonacular recipe {spoonacular_id}: {e}")
-                raise Exception(f"Error processing ingredient {ing_data['name']}: {e}") from e
+        # Process ingredients: get or create local DBIngredients in bulk, then prepare RecipeIngredientLinkCreate
+        try:
+            ingredients_by_name = await self._get_or_create_ingredients(mapped_data["ingredients_data_temp"])
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get or create ingredients for Spoonacular recipe {spoonacular_id}: {e}")
+            await self.db.rollback()
+            raise
+
+        recipe_ingredient_links_create: List[RecipeIngredientLinkCreate] = [
+            RecipeIngredientLinkCreate(
+                ingredient_id=ingredients_by_name[ing_data.name.strip().lower()].id, # Use the ID from the DB object
+                quantity=ing_data.quantity,
+                unit=ing_data.unit,
+                preparation_note=ing_data.preparation_note
+            )
+            for ing_data in mapped_data["ingredients_data_temp"]
+        ]
 
         # If after processing, no ingredients are successfully linked (e.g., all had issues)
         if not recipe_ingredient_links_create:
@@ -688,9 +739,9 @@ class RecipeService:
                 instructions=instructions_create_list,
                 ingredients=recipe_ingredient_links_create
             )
-        except Exception as e: # Catch Pydantic validation errors or other issues
+        except ValueError as e: # Pydantic's ValidationError is a ValueError
             logger.error(f"Pydantic validation error for creating RecipeCreate from Spoonacular recipe {spoonacular_id} data: {e}")
-            raise Exception(f"Data validation failed for recipe {spoonacular_id}: {e}") from e
+            raise ValueError(f"Data validation failed for recipe {spoonacular_id}: {e}") from e
 
         # Use the existing create_recipe method
         try:
@@ -698,9 +749,9 @@ class RecipeService:
             created_recipe_public = await self.create_recipe(recipe_in=recipe_to_create, user_id=user_id)
             logger.info(f"Successfully imported Spoonacular recipe {spoonacular_id} as local recipe ID {created_recipe_public.id}")
             return created_recipe_public
-        except Exception as e:
-            # Handle potential errors during recipe creation (e.g., DB issues)
+        except SQLAlchemyError as e:
             logger.error(f"Database error while saving imported Spoonacular recipe {spoonacular_id} (local title '{recipe_to_create.title}'): {e}")
-            self.db.rollback() # Ensure rollback on error
-            # Re-raise to inform the caller; specific error handling might be needed based on application flow
-            raise Exception(f"Database error saving recipe {spoonacular_id}: {e}") from e
+            await self.db.rollback() # Ensure rollback on error
+            # Re-raised unchanged for the app-wide handlers: e.g. an IntegrityError from a
+            # concurrent import of the same spoonacular_id becomes a 409, not a 500
+            raise
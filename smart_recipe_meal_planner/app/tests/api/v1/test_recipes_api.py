@@ -1,1012 +1,530 @@
+import orjson
 import pytest
+import pytest_asyncio
 import uuid
 from unittest.mock import MagicMock
 
 from fastapi import FastAPI, status
-from fastapi.testclient import TestClient
+from fastapi.responses import ORJSONResponse
+from httpx import ASGITransport, AsyncClient
+from pydantic import HttpUrl
 
 # Adjust imports based on your project structure
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
 from app.api.v1.endpoints.recipes import router as recipes_router
-from app.models.recipe_schemas import RecipeCreate, RecipePublic, RecipeUpdate, PaginatedRecipeResponse, PaginationMeta
-from app.services.recipe_service import RecipeService
+from app.core.exception_handlers import register_exception_handlers
+from app.models.recipe_schemas import RecipeCreate, RecipeUpdate
+from app.services.recipe_service import RecipeService, RecipeNotFoundException, RecipeForbiddenException
 from app.api.v1.dependencies import get_current_active_user, get_recipe_service
+from app.tests.utils import parse_json
 from app.db.models.user_model import User as DBUser
 
 
-# Fixture to set up the test client with mocked dependencies
-@pytest.fixture
-def client_and_mock_service():
-    # Create a minimal FastAPI app for testing
-    test_app = FastAPI()
-    test_app.include_router(recipes_router, prefix="/api/v1/recipes")
-
-    # Mock user
-    mock_user_id = uuid.uuid4()
-    mock_user = DBUser(
-        id=mock_user_id,
-        email="test@example.com",
-        is_active=True,
-        is_superuser=False,
-        hashed_password="mockpassword" # Not used by endpoint, but good for model completeness
-    )
-
-    def override_get_current_active_user():
-        return mock_user
-
-    # Mock recipe service
-    mock_recipe_service_instance = MagicMock(spec=RecipeService)
-
-    def override_get_recipe_service():
-        return mock_recipe_service_instance
-
-    # Apply overrides
-    test_app.dependency_overrides[get_current_active_user] = override_get_current_active_user
-    test_app.dependency_overrides[get_recipe_service] = override_get_recipe_service
-
-    client = TestClient(test_app)
-    yield client, mock_recipe_service_instance, mock_user_id # Yield mock_user_id for convenience in tests
-
-    # Clear overrides after tests
-    test_app.dependency_overrides.clear()
-
-
-# --- Test Cases ---
-
-# Helper to create a sample RecipePublic (can be expanded or moved to a conftest.py)
-def create_sample_recipe_public(recipe_id=None, user_id=None, title="Test Recipe"):
-    return RecipePublic(
-        id=recipe_id or uuid.uuid4(),
-        title=title,
-        description="A delicious test recipe",
-        ingredients=[{"name": "Test Ingredient", "quantity": "1", "unit": "cup"}],
-        instructions="Mix and bake.",
-        cooking_time_minutes=30,
-        difficulty="Easy",
-        nutritional_info={"calories": "300kcal"},
-        user_id=user_id or uuid.uuid4(),
-        tags=["test", "easy"],
-        image_url="http://example.com/image.jpg"
-    )
-
-# --- Create Recipe Tests ---
-def test_create_recipe_success(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    recipe_create_data = {
-        "title": "New Test Recipe",
-        "description": "A fresh recipe for testing",
-        "ingredients": [{"name": "New Ingredient", "quantity": "2", "unit": "pcs"}],
-        "instructions": "Follow these new instructions.",
-        "cooking_time_minutes": 45,
-        "difficulty": "Medium",
-        "tags": ["new", "test"]
-    }
-
-    # Configure mock service
-    expected_recipe_public = create_sample_recipe_public(
-        recipe_id=recipe_id,
-        user_id=current_user_id,
-        title=recipe_create_data["title"]
-    )
-    mock_service.create_recipe.return_value = expected_recipe_public
-
-    response = client.post("/api/v1/recipes/", json=recipe_create_data)
-
-    assert response.status_code == status.HTTP_201_CREATED
-    response_data = response.json()
-    assert response_data["title"] == recipe_create_data["title"]
-    assert response_data["id"] == str(recipe_id)
-    assert response_data["user_id"] == str(current_user_id)
-
-    mock_service.create_recipe.assert_called_once()
-    # More detailed argument checking if necessary:
-    # call_args = mock_service.create_recipe.call_args[1] # keyword args
-    # assert call_args['recipe_in'].title == recipe_create_data["title"]
-    # assert call_args['user_id'] == current_user_id
-
-
-def test_create_recipe_invalid_input(client_and_mock_service):
-    client, _, _ = client_and_mock_service
-    # Missing 'title' which is required
-    invalid_recipe_data = {
-        "description": "A recipe missing a title",
-        "ingredients": [{"name": "Ingredient", "quantity": "1", "unit": "cup"}],
-        "instructions": "Some instructions.",
-        "cooking_time_minutes": 30,
-        "difficulty": "Easy"
-    }
-    response = client.post("/api/v1/recipes/", json=invalid_recipe_data)
-    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-
-# --- Get Recipe by ID Tests ---
-def test_get_recipe_success(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    user_id = uuid.uuid4()
-
-    expected_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=user_id)
-    mock_service.get_recipe_by_id.return_value = expected_recipe
-
-    response = client.get(f"/api/v1/recipes/{recipe_id}")
-
-    assert response.status_code == status.HTTP_200_OK
-    response_data = response.json()
-    assert response_data["id"] == str(recipe_id)
-    assert response_data["title"] == expected_recipe.title
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-
-
-def test_get_recipe_not_found(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    mock_service.get_recipe_by_id.return_value = None
-
-    response = client.get(f"/api/v1/recipes/{recipe_id}")
-
-    assert response.status_code == status.HTTP_404_NOT_FOUND
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-
-# --- List Recipes Tests ---
-def test_list_recipes_success(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe1 = create_sample_recipe_public(title="Recipe Alpha")
-    recipe2 = create_sample_recipe_public(title="Recipe Beta")
-
-    recipes_list = [recipe1, recipe2]
-    pagination_meta = PaginationMeta(
-        total_items=2,
-        total_pages=1,
-        current_page=1,
-        limit=10
-    )
-    mock_service.get_recipes_list.return_value = (recipes_list, pagination_meta)
+# The overrides are registered once against these holders; each test only swaps
+# the objects inside them, so the app's dependency overrides never change.
+_SERVICE_HOLDER = [None]
+_USER_HOLDER = [None]
 
-    response = client.get("/api/v1/recipes/?page=1&limit=10")
 
-    assert response.status_code == status.HTTP_200_OK
-    response_data = response.json()
-    assert len(response_data["data"]) == 2
-    assert response_data["data"][0]["title"] == "Recipe Alpha"
-    assert response_data["data"][1]["title"] == "Recipe Beta"
-    assert response_data["pagination"]["total_items"] == 2
-    assert response_data["pagination"]["current_page"] == 1
+def _get_service():
+    return _SERVICE_HOLDER[0]
 
-    mock_service.get_recipes_list.assert_called_once_with(page=1, limit=10)
 
-# --- Update Recipe Tests ---
-def test_update_recipe_success(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
+def _get_user():
+    return _USER_HOLDER[0]
 
-    update_data = RecipeUpdate(title="Updated Title", description="Updated description")
-
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=current_user_id, title="Old Title")
-    updated_recipe_public = create_sample_recipe_public(
-        recipe_id=recipe_id,
-        user_id=current_user_id,
-        title=update_data.title,
-        # description=update_data.description # Assuming the service would merge and return this
-    )
-    # Ensure description is part of the returned model if RecipeUpdate includes it
-    if update_data.description:
-        updated_recipe_public.description = update_data.description
-
-
-    mock_service.get_recipe_by_id.return_value = existing_recipe # For the initial check
-    mock_service.update_recipe.return_value = updated_recipe_public
-
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_data.model_dump(exclude_unset=True))
-
-    assert response.status_code == status.HTTP_200_OK
-    response_data = response.json()
-    assert response_data["title"] == "Updated Title"
-    assert response_data["id"] == str(recipe_id)
-
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.update_recipe.assert_called_once()
-    # call_args = mock_service.update_recipe.call_args[1]
-    # assert call_args['recipe_id'] == recipe_id
-    # assert call_args['recipe_in'].title == update_data.title
-    # assert call_args['user_id'] == current_user_id
-
-
-def test_update_recipe_not_found(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    update_data = {"title": "Won't Update"}
-
-    mock_service.get_recipe_by_id.return_value = None # Recipe doesn't exist
-
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_data)
-
-    assert response.status_code == status.HTTP_404_NOT_FOUND
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.update_recipe.assert_not_called()
-
-
-def test_update_recipe_forbidden(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    other_user_id = uuid.uuid4() # Recipe belongs to someone else
-    update_data = RecipeUpdate(title="Attempted Update")
-
-    # Recipe exists, but belongs to another user or update fails for auth reasons
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=other_user_id)
-
-    mock_service.get_recipe_by_id.return_value = existing_recipe
-    mock_service.update_recipe.return_value = None # Service indicates auth failure
-
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_data.model_dump(exclude_unset=True))
-
-    assert response.status_code == status.HTTP_403_FORBIDDEN
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.update_recipe.assert_called_once()
-
-
-# --- Delete Recipe Tests ---
-def test_delete_recipe_success(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
-
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=current_user_id)
-    mock_service.get_recipe_by_id.return_value = existing_recipe # For the initial check
-    mock_service.delete_recipe.return_value = True # Deletion successful
-
-    response = client.delete(f"/api/v1/recipes/{recipe_id}")
-
-    assert response.status_code == status.HTTP_204_NO_CONTENT
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.delete_recipe.assert_called_once_with(recipe_id=recipe_id, user_id=current_user_id)
 
+@pytest.fixture(scope="module")
+def test_app():
+    # Create a minimal FastAPI app for testing
+    test_app = FastAPI(default_response_class=ORJSONResponse)
+    # Mount the recipes router. The prefix here should match how it's mounted in the main app
+    # or be consistent for testing purposes.
+    test_app.include_router(recipes_router, prefix="/api/v1/recipes")
+    register_exception_handlers(test_app)
 
-def test_delete_recipe_not_found(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
+    test_app.dependency_overrides[get_current_active_user] = _get_user
+    test_app.dependency_overrides[get_recipe_service] = _get_service
 
-    mock_service.get_recipe_by_id.return_value = None # Recipe doesn't exist
+    yield test_app
 
-    response = client.delete(f"/api/v1/recipes/{recipe_id}")
+    # Clear overrides after the module's tests
+    test_app.dependency_overrides.clear()
 
-    assert response.status_code == status.HTTP_404_NOT_FOUND
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.delete_recipe.assert_not_called()
 
+# The spec'd mock is built once per run; reset_mock_recipe_service clears its
+# calls, return values and side effects after every test.
+@pytest.fixture(scope="session")
+def mock_recipe_service():
+    return MagicMock(spec=RecipeService)
 
-def test_delete_recipe_forbidden(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    other_user_id = uuid.uuid4()
 
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=other_user_id)
-    mock_service.get_recipe_by_id.return_value = existing_recipe # Recipe exists
-    mock_service.delete_recipe.return_value = False # Deletion fails (auth)
+@pytest.fixture(autouse=True)
+def reset_mock_recipe_service(mock_recipe_service):
+    yield
+    mock_recipe_service.reset_mock(return_value=True, side_effect=True)
 
-    response = client.delete(f"/api/v1/recipes/{recipe_id}")
 
-    assert response.status_code == status.HTTP_403_FORBIDDEN
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.delete_recipe.assert_called_once_with(recipe_id=recipe_id, user_id=current_user_id)
+# The client talks to the app in-process over ASGITransport, without the
+# thread portal TestClient uses to drive the async app synchronously. It and
+# the mock user are shared by the tests of one class.
+@pytest_asyncio.fixture(scope="class", loop_scope="class")
+async def async_client(test_app):
+    async with AsyncClient(transport=ASGITransport(app=test_app), base_url="http://test") as client:
+        yield client
 
-# Example of a more detailed check for create_recipe arguments
-def test_create_recipe_detailed_arg_check(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    recipe_create_payload = RecipeCreate(
-        title="Detailed Check Recipe",
-        description="Description for detailed check.",
-        ingredients=[{"name": "Detailed Ing", "quantity": "1", "unit": "item"}],
-        instructions="Detailed instructions.",
-        cooking_time_minutes=60,
-        difficulty="Hard",
-        tags=["detail", "check"],
-        nutritional_info={"calories": "500kcal"},
-        image_url="http://example.com/detailed.jpg"
-    )
 
-    expected_recipe_public = RecipePublic(
-        id=recipe_id,
-        user_id=current_user_id,
-        **recipe_create_payload.model_dump()
-    )
-    mock_service.create_recipe.return_value = expected_recipe_public
-
-    response = client.post("/api/v1/recipes/", json=recipe_create_payload.model_dump())
-
-    assert response.status_code == status.HTTP_201_CREATED
-
-    mock_service.create_recipe.assert_called_once()
-    args, kwargs = mock_service.create_recipe.call_args
-
-    # Check the RecipeCreate model passed to the service
-    assert isinstance(kwargs['recipe_in'], RecipeCreate)
-    assert kwargs['recipe_in'].title == recipe_create_payload.title
-    assert kwargs['recipe_in'].description == recipe_create_payload.description
-    assert kwargs['recipe_in'].ingredients[0].name == recipe_create_payload.ingredients[0].name
-
-    # Check the user_id passed to the service
-    assert kwargs['user_id'] == current_user_id
-
-    response_data = response.json()
-    assert response_data["title"] == recipe_create_payload.title
-    assert response_data["id"] == str(recipe_id)
-    assert response_data["user_id"] == str(current_user_id)
-
-# (Add more tests as needed, e.g., for pagination parameters in list_recipes)
-def test_list_recipes_pagination_params(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-
-    recipes_list = [create_sample_recipe_public()]
-    pagination_meta = PaginationMeta(total_items=1, total_pages=1, current_page=5, limit=50)
-    mock_service.get_recipes_list.return_value = (recipes_list, pagination_meta)
-
-    response = client.get("/api/v1/recipes/?page=5&limit=50")
-
-    assert response.status_code == status.HTTP_200_OK
-    mock_service.get_recipes_list.assert_called_once_with(page=5, limit=50)
-    response_data = response.json()
-    assert response_data["pagination"]["current_page"] == 5
-    assert response_data["pagination"]["limit"] == 50
-
-# Test for optional fields in RecipeCreate (e.g. nutritional_info, image_url)
-def test_create_recipe_with_optional_fields(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    recipe_create_data = {
-        "title": "Recipe With Opts",
-        "description": "Desc for opts",
-        "ingredients": [{"name": "Opt Ing", "quantity": "1", "unit": "g"}],
-        "instructions": "Opt instructions.",
-        "cooking_time_minutes": 20,
-        "difficulty": "Easy",
-        "nutritional_info": {"calories": "100kcal", "protein": "10g"}, # Optional
-        "image_url": "http://example.com/optional.jpg", # Optional
-        "tags": ["optional"]
-    }
-
-    expected_recipe_public = RecipePublic(
-        id=recipe_id,
-        user_id=current_user_id,
-        title=recipe_create_data["title"],
-        description=recipe_create_data["description"],
-        ingredients=recipe_create_data["ingredients"],
-        instructions=recipe_create_data["instructions"],
-        cooking_time_minutes=recipe_create_data["cooking_time_minutes"],
-        difficulty=recipe_create_data["difficulty"],
-        nutritional_info=recipe_create_data["nutritional_info"],
-        image_url=recipe_create_data["image_url"],
-        tags=recipe_create_data["tags"]
-    )
-    mock_service.create_recipe.return_value = expected_recipe_public
-
-    response = client.post("/api/v1/recipes/", json=recipe_create_data)
-
-    assert response.status_code == status.HTTP_201_CREATED
-    response_data = response.json()
-    assert response_data["title"] == recipe_create_data["title"]
-    assert response_data["nutritional_info"]["protein"] == "10g"
-    assert response_data["image_url"] == recipe_create_data["image_url"]
-
-    mock_service.create_recipe.assert_called_once()
-    call_args = mock_service.create_recipe.call_args[1]
-    assert call_args['recipe_in'].nutritional_info == recipe_create_data["nutritional_info"]
-    assert call_args['recipe_in'].image_url == recipe_create_data["image_url"]
-
-# Test for update with partial data
-def test_update_recipe_partial_data(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
-
-    # Only updating description and tags
-    update_data = RecipeUpdate(description="New partial description", tags=["partial", "update"])
-
-    existing_recipe = create_sample_recipe_public(
-        recipe_id=recipe_id,
-        user_id=current_user_id,
-        title="Original Title for Partial Update",
-        description="Old description",
-        tags=["old_tag"]
-    )
-    # The updated recipe would retain old title, but have new description and tags
-    updated_recipe_public = create_sample_recipe_public(
-        recipe_id=recipe_id,
-        user_id=current_user_id,
-        title=existing_recipe.title, # Title remains the same
-        description=update_data.description, # Description is updated
-        tags=update_data.tags # Tags are updated
-    )
-
-    mock_service.get_recipe_by_id.return_value = existing_recipe
-    mock_service.update_recipe.return_value = updated_recipe_public
-
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_data.model_dump(exclude_unset=True))
-
-    assert response.status_code == status.HTTP_200_OK
-    response_data = response.json()
-    assert response_data["title"] == existing_recipe.title # Title should not have changed
-    assert response_data["description"] == "New partial description"
-    assert "partial" in response_data["tags"]
-
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.update_recipe.assert_called_once()
-    call_args = mock_service.update_recipe.call_args[1]
-    assert call_args['recipe_in'].title is None # Title was not part of the update payload
-    assert call_args['recipe_in'].description == update_data.description
-    assert call_args['recipe_in'].tags == update_data.tags
-    assert call_args['user_id'] == current_user_id
-    assert call_args['recipe_id'] == recipe_id
-
-# Test for server error during create
-def test_create_recipe_server_error(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_create_data = { "title": "Error Recipe", "description": "...", "ingredients": [], "instructions": "...", "cooking_time_minutes": 1, "difficulty": "Easy"}
-
-    mock_service.create_recipe.side_effect = Exception("Database connection failed")
-
-    response = client.post("/api/v1/recipes/", json=recipe_create_data)
-
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred" in response.json()["detail"].lower()
-
-# Test for server error during get
-def test_get_recipe_server_error(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
-
-    mock_service.get_recipe_by_id.side_effect = Exception("Database query failed")
-
-    response = client.get(f"/api/v1/recipes/{recipe_id}")
-
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred" in response.json()["detail"].lower()
-
-# Test for server error during list
-def test_list_recipes_server_error(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-
-    mock_service.get_recipes_list.side_effect = Exception("Database query failed")
-
-    response = client.get("/api/v1/recipes/?page=1&limit=10")
-
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred" in response.json()["detail"].lower()
-
-# Test for server error during update
-def test_update_recipe_server_error(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    update_data = {"title": "Error Update"}
-
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=current_user_id)
-    mock_service.get_recipe_by_id.return_value = existing_recipe # First check passes
-    mock_service.update_recipe.side_effect = Exception("Database update failed")
-
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_data)
-
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred" in response.json()["detail"].lower()
-
-# Test for server error during delete
-def test_delete_recipe_server_error(client_and_mock_service):
-    client, mock_service, current_user_id = client_and_mock_service
-    recipe_id = uuid.uuid4()
-
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=current_user_id)
-    mock_service.get_recipe_by_id.return_value = existing_recipe # First check passes
-    mock_service.delete_recipe.side_effect = Exception("Database delete failed")
-
-    response = client.delete(f"/api/v1/recipes/{recipe_id}")
-
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred" in response.json()["detail"].lower()
-
-# Ensure the directory structure is created by the tool if it doesn't exist.
-# The tool automatically handles directory creation for `create_file_with_block`.
-# No explicit directory creation command is needed here.
-# Final check: ensure all models are correctly imported and used.
-# RecipeCreate, RecipePublic, RecipeUpdate, PaginatedRecipeResponse, PaginationMeta
-# DBUser (as User)
-# Make sure paths in imports like `from app.main import app` are correct.
-# Here, we are not using `app.main` but constructing a minimal app with the router directly.
-# `from app.api.v1.endpoints.recipes import router as recipes_router` - this is correct for this setup.
-# `from app.models.recipe_schemas import ...` - this assumes 'app' is in PYTHONPATH.
-# `from app.services.recipe_service import RecipeService` - same assumption.
-# `from app.api.v1.dependencies import ...` - same assumption.
-# `from app.db.models.user_model import User as DBUser` - same assumption.
-# These paths should be valid if tests are run from the project root where `PYTHONPATH` includes the `smart_recipe_meal_planner` directory,
-# or if the `app` directory itself is added to `PYTHONPATH`.
-# For pytest, it usually handles this well if run from the project root.
-# The `create_sample_recipe_public` helper uses many fields from `RecipePublic`.
-# The `PaginatedRecipeResponse` is used in `test_list_recipes_success`.
-# `RecipeUpdate` is used in update tests.
-# `RecipeCreate` is used in create tests.
-# `DBUser` is used for the mock user.
-# All looks consistent with the plan.
-```python
-import pytest
-import uuid
-from unittest.mock import MagicMock
-
-from fastapi import FastAPI, status
-from fastapi.testclient import TestClient
-
-# Adjust imports based on your project structure
-# Assuming tests are run from a context where 'app' is a top-level package
-# e.g. from the root of 'smart_recipe_meal_planner/smart_recipe_meal_planner/'
-from app.api.v1.endpoints.recipes import router as recipes_router
-from app.models.recipe_schemas import RecipeCreate, RecipePublic, RecipeUpdate, PaginatedRecipeResponse, PaginationMeta
-from app.services.recipe_service import RecipeService
-from app.api.v1.dependencies import get_current_active_user, get_recipe_service
-from app.db.models.user_model import User as DBUser
-
-
-# Fixture to set up the test client with mocked dependencies
-@pytest.fixture
-def client_and_mock_service():
-    # Create a minimal FastAPI app for testing
-    test_app = FastAPI()
-    # Mount the recipes router. The prefix here should match how it's mounted in the main app
-    # or be consistent for testing purposes.
-    test_app.include_router(recipes_router, prefix="/api/v1/recipes")
-
-    # Mock user
-    mock_user_id = uuid.uuid4()
-    mock_user = DBUser(
-        id=mock_user_id,
+@pytest.fixture(scope="class")
+def mock_user():
+    return DBUser(
+        id=uuid.uuid4(),
         email="test@example.com",
         is_active=True,
-        is_superuser=False,
         hashed_password="mockpassword" # Not used by endpoint, but good for model completeness
     )
 
-    def override_get_current_active_user():
-        return mock_user
-
-    # Mock recipe service
-    mock_recipe_service_instance = MagicMock(spec=RecipeService)
 
-    def override_get_recipe_service():
-        return mock_recipe_service_instance
+# Fixture to set up the test client with mocked dependencies
+@pytest.fixture
+def client_and_mock_service(async_client, mock_recipe_service, mock_user):
+    _SERVICE_HOLDER[0] = mock_recipe_service
+    _USER_HOLDER[0] = mock_user
 
-    # Apply overrides
-    test_app.dependency_overrides[get_current_active_user] = override_get_current_active_user
-    test_app.dependency_overrides[get_recipe_service] = override_get_recipe_service
+    yield async_client, mock_recipe_service, mock_user # Yield mock_user for convenience in tests
 
-    client = TestClient(test_app)
-    yield client, mock_recipe_service_instance, mock_user # Yield mock_user for convenience in tests
-
-    # Clear overrides after tests
-    test_app.dependency_overrides.clear()
+    _SERVICE_HOLDER[0] = None
+    _USER_HOLDER[0] = None
 
 
 # --- Test Cases ---
 
-# Helper to create a sample RecipePublic (can be expanded or moved to a conftest.py)
-def create_sample_recipe_public(recipe_id=None, user_id=None, title="Test Recipe", description="A delicious test recipe", ingredients=None, instructions="Mix and bake.", cooking_time_minutes=30, difficulty="Easy", nutritional_info=None, tags=None, image_url=None):
-    return RecipePublic(
-        id=recipe_id or uuid.uuid4(),
-        title=title,
-        description=description,
-        ingredients=ingredients or [{"name": "Test Ingredient", "quantity": "1", "unit": "cup"}],
-        instructions=instructions,
-        cooking_time_minutes=cooking_time_minutes,
-        difficulty=difficulty,
-        nutritional_info=nutritional_info or {"calories": "300kcal"},
-        user_id=user_id or uuid.uuid4(),
-        tags=tags or ["test", "easy"],
-        image_url=image_url or "http://example.com/image.jpg"
-    )
-
-# --- Create Recipe Tests ---
-def test_create_recipe_success(client_and_mock_service):
-    client, mock_service, current_user = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    recipe_create_data = {
+# Helper to build a valid RecipeCreate request body
+def create_recipe_payload(**overrides):
+    payload = {
         "title": "New Test Recipe",
         "description": "A fresh recipe for testing",
-        "ingredients": [{"name": "New Ingredient", "quantity": "2", "unit": "pcs"}],
-        "instructions": "Follow these new instructions.",
-        "cooking_time_minutes": 45,
-        "difficulty": "Medium",
-        "tags": ["new", "test"],
-        "nutritional_info": {"calories": "450kcal"},
-        "image_url": "http://example.com/new.jpg"
-    }
-
-    # Configure mock service
-    # The service's create_recipe method is expected to return a RecipePublic model
-    expected_recipe_public = RecipePublic(
-        id=recipe_id,
-        user_id=current_user.id,
-        **recipe_create_data
-    )
-    mock_service.create_recipe.return_value = expected_recipe_public
-
-    response = client.post("/api/v1/recipes/", json=recipe_create_data)
-
-    assert response.status_code == status.HTTP_201_CREATED
-    response_data = response.json()
-    assert response_data["title"] == recipe_create_data["title"]
-    assert response_data["id"] == str(recipe_id)
-    assert response_data["user_id"] == str(current_user.id)
-
-    mock_service.create_recipe.assert_called_once()
-    # Check that the service was called with a RecipeCreate model and the correct user_id
-    call_args = mock_service.create_recipe.call_args[1] # keyword args
-    assert isinstance(call_args['recipe_in'], RecipeCreate)
-    assert call_args['recipe_in'].title == recipe_create_data["title"]
-    assert call_args['user_id'] == current_user.id
-
-
-def test_create_recipe_invalid_input(client_and_mock_service):
-    client, _, _ = client_and_mock_service
-    # Missing 'title' which is required by RecipeCreate
-    invalid_recipe_data = {
-        "description": "A recipe missing a title",
-        "ingredients": [{"name": "Ingredient", "quantity": "1", "unit": "cup"}],
-        "instructions": "Some instructions.",
-        "cooking_time_minutes": 30,
-        "difficulty": "Easy"
+        "cook_time_minutes": 45,
+        "difficulty_level": "medium",
+        "dietary_tags": ["new", "test"],
+        "instructions": [{"step_number": 1, "instruction": "Follow these new instructions."}],
+        "ingredients": [{"ingredient_id": str(uuid.uuid4()), "quantity": 2, "unit": "pcs"}],
     }
-    response = client.post("/api/v1/recipes/", json=invalid_recipe_data)
-    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-
-# --- Get Recipe by ID Tests ---
-def test_get_recipe_success(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
-
-    expected_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=uuid.uuid4())
-    mock_service.get_recipe_by_id.return_value = expected_recipe
-
-    response = client.get(f"/api/v1/recipes/{recipe_id}")
-
-    assert response.status_code == status.HTTP_200_OK
-    response_data = response.json()
-    assert response_data["id"] == str(recipe_id)
-    assert response_data["title"] == expected_recipe.title
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-
-
-def test_get_recipe_not_found(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    mock_service.get_recipe_by_id.return_value = None
-
-    response = client.get(f"/api/v1/recipes/{recipe_id}")
-
-    assert response.status_code == status.HTTP_404_NOT_FOUND
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-
-# --- List Recipes Tests ---
-def test_list_recipes_success(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe1_id, recipe2_id = uuid.uuid4(), uuid.uuid4()
-    user_id = uuid.uuid4()
-
-    recipe1 = create_sample_recipe_public(recipe_id=recipe1_id, user_id=user_id, title="Recipe Alpha")
-    recipe2 = create_sample_recipe_public(recipe_id=recipe2_id, user_id=user_id, title="Recipe Beta")
-
-    recipes_list = [recipe1, recipe2]
-    pagination_meta = PaginationMeta(
-        total_items=2,
-        total_pages=1,
-        current_page=1,
-        limit=10 # Assuming default or passed limit
-    )
-    mock_service.get_recipes_list.return_value = (recipes_list, pagination_meta)
-
-    response = client.get("/api/v1/recipes/?page=1&limit=10")
-
-    assert response.status_code == status.HTTP_200_OK
-    response_data = response.json()
-    assert len(response_data["data"]) == 2
-    assert response_data["data"][0]["title"] == "Recipe Alpha"
-    assert response_data["data"][1]["title"] == "Recipe Beta"
-    assert response_data["pagination"]["total_items"] == 2
-    assert response_data["pagination"]["current_page"] == 1
-
-    mock_service.get_recipes_list.assert_called_once_with(page=1, limit=10)
-
-# --- Update Recipe Tests ---
-def test_update_recipe_success(client_and_mock_service):
-    client, mock_service, current_user = client_and_mock_service
-    recipe_id = uuid.uuid4()
-
-    update_data_dict = {"title": "Updated Title", "description": "Updated description"}
-    update_data_model = RecipeUpdate(**update_data_dict) # Pydantic model for service call
-
-    # Recipe as it exists before update
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=current_user.id, title="Old Title")
-
-    # Recipe as it should look after update
-    updated_recipe_public = RecipePublic(
-        id=recipe_id,
-        user_id=current_user.id,
-        title=update_data_dict["title"],
-        description=update_data_dict["description"],
-        # Other fields would typically be from existing_recipe, service handles merge
-        ingredients=existing_recipe.ingredients,
-        instructions=existing_recipe.instructions,
-        cooking_time_minutes=existing_recipe.cooking_time_minutes,
-        difficulty=existing_recipe.difficulty,
-        tags=existing_recipe.tags,
-        nutritional_info=existing_recipe.nutritional_info,
-        image_url=existing_recipe.image_url
-    )
+    payload.update(overrides)
+    return payload
+
+
+# Request bodies are encoded once per module and sent as raw content, so httpx
+# does not re-serialize them on every call.
+_JSON_HEADERS = {"content-type": "application/json"}
+
+_ALL_OPTS_CREATE_DATA = create_recipe_payload(
+    title="Recipe With All Opts",
+    calories=100.0, # Optional
+    protein=10.0, # Optional
+    image_url="http://example.com/optional.jpg", # Optional
+)
+_ALL_OPTS_CREATE_BODY = orjson.dumps(_ALL_OPTS_CREATE_DATA)
+
+_UPDATE_DATA = {"title": "Updated Title", "description": "Updated description"}
+_UPDATE_BODY = orjson.dumps(_UPDATE_DATA)
+
+_RECIPE_ID = uuid.uuid4()
+
+
+@pytest.mark.asyncio(loop_scope="class")
+class TestCreateRecipe:
+    """POST /recipes/"""
+
+    async def test_create_recipe_success(self, client_and_mock_service, recipe_public_factory):
+        client, mock_service, current_user = client_and_mock_service
+        recipe_id = uuid.uuid4()
+        recipe_create_data = create_recipe_payload()
+
+        # Configure mock service
+        # The service's create_recipe method is expected to return a RecipePublic model
+        expected_recipe_public = recipe_public_factory(
+            id=recipe_id,
+            created_by_user_id=current_user.id,
+            title=recipe_create_data["title"]
+        )
+        mock_service.create_recipe.return_value = expected_recipe_public
+
+        response = await client.post("/api/v1/recipes/", json=recipe_create_data)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        response_data = parse_json(response)
+        assert response_data["title"] == recipe_create_data["title"]
+        assert response_data["id"] == str(recipe_id)
+        assert response_data["created_by_user_id"] == str(current_user.id)
+
+        calls = mock_service.create_recipe.call_args_list
+        assert len(calls) == 1
+        # Check that the service was called with a RecipeCreate model and the correct user_id
+        call_args = calls[0].kwargs
+        assert isinstance(call_args['recipe_in'], RecipeCreate)
+        assert call_args['recipe_in'].title == recipe_create_data["title"]
+        assert str(call_args['recipe_in'].ingredients[0].ingredient_id) == recipe_create_data["ingredients"][0]["ingredient_id"]
+        assert call_args['user_id'] == current_user.id
+
+    async def test_create_recipe_invalid_input(self, client_and_mock_service):
+        client, _, _ = client_and_mock_service
+        # Missing 'title' which is required by RecipeCreate
+        invalid_recipe_data = create_recipe_payload()
+        del invalid_recipe_data["title"]
+
+        response = await client.post("/api/v1/recipes/", json=invalid_recipe_data)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_create_recipe_with_all_optional_fields(self, client_and_mock_service, recipe_public_factory):
+        client, mock_service, current_user = client_and_mock_service
+        recipe_id = uuid.uuid4()
+        recipe_create_data = _ALL_OPTS_CREATE_DATA
+
+        expected_recipe_public = recipe_public_factory(
+            id=recipe_id,
+            created_by_user_id=current_user.id,
+            title=recipe_create_data["title"],
+            image_url=HttpUrl(recipe_create_data["image_url"]),
+            calories=100.0,
+            protein=10.0,
+        )
+        mock_service.create_recipe.return_value = expected_recipe_public
+
+        response = await client.post("/api/v1/recipes/", content=_ALL_OPTS_CREATE_BODY, headers=_JSON_HEADERS)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        response_data = parse_json(response)
+        assert response_data["title"] == recipe_create_data["title"]
+        assert response_data["protein"] == 10.0
+        assert response_data["image_url"] == recipe_create_data["image_url"]
+
+        calls = mock_service.create_recipe.call_args_list
+        assert len(calls) == 1
+        call_args = calls[0].kwargs
+        assert isinstance(call_args['recipe_in'], RecipeCreate)
+        assert call_args['recipe_in'].calories == recipe_create_data["calories"]
+        assert str(call_args['recipe_in'].image_url) == recipe_create_data["image_url"]
+
+@pytest.mark.asyncio(loop_scope="class")
+class TestGetRecipe:
+    """GET /recipes/{recipe_id}"""
+
+    async def test_get_recipe_success(self, client_and_mock_service, recipe_public):
+        client, mock_service, _ = client_and_mock_service
+        recipe_id = recipe_public.id
+
+        expected_recipe = recipe_public
+        mock_service.get_recipe_by_id.return_value = expected_recipe
+
+        response = await client.get(f"/api/v1/recipes/{recipe_id}")
+
+        assert response.status_code == status.HTTP_200_OK
+        response_data = parse_json(response)
+        assert response_data["id"] == str(recipe_id)
+        assert response_data["title"] == expected_recipe.title
+        mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
+
+@pytest.mark.asyncio(loop_scope="class")
+class TestListRecipes:
+    """GET /recipes/"""
+
+    async def test_list_recipes_success(self, client_and_mock_service, recipe_public_factory):
+        client, mock_service, _ = client_and_mock_service
+        user_id = uuid.uuid4()
+
+        recipe1 = recipe_public_factory(created_by_user_id=user_id, title="Recipe Alpha")
+        recipe2 = recipe_public_factory(created_by_user_id=user_id, title="Recipe Beta")
+
+        recipes_list = [recipe1, recipe2]
+        pagination_meta = {
+            "currentPage": 1,
+            "totalPages": 1,
+            "totalItems": 2,
+            "hasNext": False,
+            "hasPrevious": False,
+            "itemsPerPage": 10,
+        }
+        mock_service.get_recipes_list.return_value = (recipes_list, pagination_meta)
+
+        response = await client.get("/api/v1/recipes/?page=1&limit=10")
+
+        assert response.status_code == status.HTTP_200_OK
+        response_data = parse_json(response)
+        assert len(response_data["data"]) == 2
+        assert response_data["data"][0]["title"] == "Recipe Alpha"
+        assert response_data["data"][1]["title"] == "Recipe Beta"
+        assert response_data["pagination"]["totalItems"] == 2
+        assert response_data["pagination"]["currentPage"] == 1
+
+        mock_service.get_recipes_list.assert_called_once_with(page=1, limit=10, cuisine=None, dietary_tags=None, max_cook_time=None, search_query=None, cursor=None, include_total=True)
+
+    async def test_list_recipes_pagination_params(self, client_and_mock_service, recipe_public):
+        client, mock_service, _ = client_and_mock_service
+
+        recipes_list = [recipe_public] # Dummy list
+        # Ensure pagination meta reflects requested params
+        pagination_meta = {"currentPage": 5, "totalPages": 5, "totalItems": 201, "itemsPerPage": 50}
+        mock_service.get_recipes_list.return_value = (recipes_list, pagination_meta)
+
+        response = await client.get("/api/v1/recipes/?page=5&limit=50")
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_service.get_recipes_list.assert_called_once_with(page=5, limit=50, cuisine=None, dietary_tags=None, max_cook_time=None, search_query=None, cursor=None, include_total=True)
+        response_data = parse_json(response)
+        assert response_data["pagination"]["currentPage"] == 5
+        assert response_data["pagination"]["itemsPerPage"] == 50
+
+    async def test_list_recipes_invalid_cursor(self, client_and_mock_service):
+        client, mock_service, _ = client_and_mock_service
+        mock_service.get_recipes_list.side_effect = ValueError("Invalid cursor: 'nope'")
+
+        response = await client.get("/api/v1/recipes/?cursor=nope")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert parse_json(response)["detail"] == "Invalid cursor: 'nope'"
+        mock_service.get_recipes_list.assert_called_once_with(page=1, limit=10, cuisine=None, dietary_tags=None, max_cook_time=None, search_query=None, cursor="nope", include_total=True)
+
+    async def test_list_recipes_search(self, client_and_mock_service, recipe_public):
+        client, mock_service, _ = client_and_mock_service
+        mock_service.get_recipes_list.return_value = ([recipe_public], {"currentPage": 1, "totalItems": 1})
+
+        response = await client.get("/api/v1/recipes/", params={"search": "tomato soup"})
 
-    mock_service.get_recipe_by_id.return_value = existing_recipe # For the initial check in the endpoint
-    mock_service.update_recipe.return_value = updated_recipe_public
+        assert response.status_code == status.HTTP_200_OK
+        mock_service.get_recipes_list.assert_called_once_with(page=1, limit=10, cuisine=None, dietary_tags=None, max_cook_time=None, search_query="tomato soup", cursor=None, include_total=True)
+
+    async def test_list_recipes_filters(self, client_and_mock_service, recipe_public):
+        client, mock_service, _ = client_and_mock_service
+        mock_service.get_recipes_list.return_value = ([recipe_public], {"currentPage": 1, "totalItems": 1})
 
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_data_dict)
+        response = await client.get(
+            "/api/v1/recipes/",
+            params={"cuisine": "Italian", "dietary_tags": ["vegan", "gluten free"], "max_cook_time": 30},
+        )
 
-    assert response.status_code == status.HTTP_200_OK
-    response_data = response.json()
-    assert response_data["title"] == "Updated Title"
-    assert response_data["description"] == "Updated description"
-    assert response_data["id"] == str(recipe_id)
+        assert response.status_code == status.HTTP_200_OK
+        mock_service.get_recipes_list.assert_called_once_with(
+            page=1, limit=10, cuisine="Italian", dietary_tags=["vegan", "gluten free"], max_cook_time=30,
+            search_query=None, cursor=None, include_total=True,
+        )
 
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
+    async def test_list_recipes_negative_max_cook_time(self, client_and_mock_service):
+        client, mock_service, _ = client_and_mock_service
 
-    mock_service.update_recipe.assert_called_once()
-    call_args = mock_service.update_recipe.call_args[1]
-    assert call_args['recipe_id'] == recipe_id
-    assert isinstance(call_args['recipe_in'], RecipeUpdate)
-    assert call_args['recipe_in'].title == update_data_model.title
-    assert call_args['recipe_in'].description == update_data_model.description
-    assert call_args['user_id'] == current_user.id
+        response = await client.get("/api/v1/recipes/?max_cook_time=-1")
 
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        mock_service.get_recipes_list.assert_not_called()
 
-def test_update_recipe_not_found(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    update_data = {"title": "Won't Update"}
 
-    mock_service.get_recipe_by_id.return_value = None # Recipe doesn't exist for the initial check
+@pytest.mark.asyncio(loop_scope="class")
+class TestConditionalGet:
+    """ETag / If-None-Match on GET /recipes/ and GET /recipes/{recipe_id}"""
 
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_data)
+    @pytest.mark.parametrize("url", ["/api/v1/recipes/?page=1&limit=10", f"/api/v1/recipes/{_RECIPE_ID}"], ids=["list", "get"])
+    async def test_unchanged_recipe_data_is_not_resent(self, client_and_mock_service, recipe_public, url):
+        client, mock_service, _ = client_and_mock_service
+        mock_service.get_recipes_list.return_value = ([recipe_public], {"currentPage": 1, "totalItems": 1})
+        mock_service.get_recipe_by_id.return_value = recipe_public
 
-    assert response.status_code == status.HTTP_404_NOT_FOUND
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.update_recipe.assert_not_called()
+        first = await client.get(url)
+        etag = first.headers["etag"]
 
+        unchanged = await client.get(url, headers={"If-None-Match": f'"other", {etag}'})
+        assert unchanged.status_code == status.HTTP_304_NOT_MODIFIED
+        assert unchanged.headers["etag"] == etag
+        assert unchanged.content == b""
 
-def test_update_recipe_forbidden(client_and_mock_service):
-    client, mock_service, current_user = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    # Recipe belongs to a different user or update fails for auth reasons at service level
-    other_user_id = uuid.uuid4()
-    update_data_dict = {"title": "Attempted Update"}
+        # Once the data changes, so does the ETag, and the body is sent again
+        mock_service.get_recipes_list.return_value = ([recipe_public.model_copy(update={"title": "Renamed"})], {"currentPage": 1, "totalItems": 1})
+        mock_service.get_recipe_by_id.return_value = recipe_public.model_copy(update={"title": "Renamed"})
+        changed = await client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed.headers["etag"] != etag
 
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=other_user_id)
+@pytest.mark.asyncio(loop_scope="class")
+class TestUpdateRecipe:
+    """PUT /recipes/{recipe_id}"""
 
-    mock_service.get_recipe_by_id.return_value = existing_recipe # Recipe found
-    mock_service.update_recipe.return_value = None # Service indicates auth failure or inability to update
+    @pytest.mark.parametrize("recipe_public__title", ["Old Title"])
+    async def test_update_recipe_success(self, client_and_mock_service, recipe_public):
+        client, mock_service, current_user = client_and_mock_service
+        recipe_id = recipe_public.id
 
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_data_dict)
+        update_data_dict = _UPDATE_DATA
 
-    assert response.status_code == status.HTTP_403_FORBIDDEN
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
+        # Recipe as it exists before update
+        existing_recipe = recipe_public
 
-    mock_service.update_recipe.assert_called_once()
-    call_args = mock_service.update_recipe.call_args[1]
-    assert call_args['recipe_id'] == recipe_id
-    assert isinstance(call_args['recipe_in'], RecipeUpdate)
-    assert call_args['recipe_in'].title == update_data_dict["title"]
-    assert call_args['user_id'] == current_user.id
+        # Recipe as it should look after update
+        updated_recipe_public = existing_recipe.model_copy(update=update_data_dict)
 
+        mock_service.update_recipe.return_value = updated_recipe_public
 
-# --- Delete Recipe Tests ---
-def test_delete_recipe_success(client_and_mock_service):
-    client, mock_service, current_user = client_and_mock_service
-    recipe_id = uuid.uuid4()
+        response = await client.put(f"/api/v1/recipes/{recipe_id}", content=_UPDATE_BODY, headers=_JSON_HEADERS)
 
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=current_user.id)
-    mock_service.get_recipe_by_id.return_value = existing_recipe # For the initial check
-    mock_service.delete_recipe.return_value = True # Deletion successful at service level
+        assert response.status_code == status.HTTP_200_OK
+        response_data = parse_json(response)
+        assert response_data["title"] == "Updated Title"
+        assert response_data["description"] == "Updated description"
+        assert response_data["id"] == str(recipe_id)
 
-    response = client.delete(f"/api/v1/recipes/{recipe_id}")
+        mock_service.get_recipe_by_id.assert_not_called()
 
-    assert response.status_code == status.HTTP_204_NO_CONTENT
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.delete_recipe.assert_called_once_with(recipe_id=recipe_id, user_id=current_user.id)
+        calls = mock_service.update_recipe.call_args_list
+        assert len(calls) == 1
+        call_args = calls[0].kwargs
+        assert call_args['recipe_id'] == recipe_id
+        assert isinstance(call_args['recipe_in'], RecipeUpdate)
+        assert call_args['recipe_in'].title == update_data_dict["title"]
+        assert call_args['recipe_in'].description == update_data_dict["description"]
+        assert call_args['user_id'] == current_user.id
 
+    @pytest.mark.parametrize(
+        "recipe_public__title,recipe_public__description,recipe_public__dietary_tags",
+        [("Original Title for Partial Update", "Old description", ["old_tag"])],
+    )
+    async def test_update_recipe_partial_data(self, client_and_mock_service, recipe_public):
+        client, mock_service, current_user = client_and_mock_service
+        recipe_id = recipe_public.id
 
-def test_delete_recipe_not_found(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
+        update_payload_dict = {"description": "New partial description", "dietary_tags": ["partial", "update"]}
 
-    mock_service.get_recipe_by_id.return_value = None # Recipe doesn't exist for the initial check
+        existing_recipe = recipe_public
 
-    response = client.delete(f"/api/v1/recipes/{recipe_id}")
+        # Expected result after partial update; other fields remain from 'existing_recipe'
+        updated_recipe_public = existing_recipe.model_copy(update=update_payload_dict)
 
-    assert response.status_code == status.HTTP_404_NOT_FOUND
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.delete_recipe.assert_not_called()
+        mock_service.update_recipe.return_value = updated_recipe_public
 
+        response = await client.put(f"/api/v1/recipes/{recipe_id}", json=update_payload_dict)
 
-def test_delete_recipe_forbidden(client_and_mock_service):
-    client, mock_service, current_user = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    other_user_id = uuid.uuid4() # Recipe belongs to another user
+        assert response.status_code == status.HTTP_200_OK
+        response_data = parse_json(response)
+        assert response_data["title"] == existing_recipe.title # Title should not have changed
+        assert response_data["description"] == "New partial description"
+        assert "partial" in response_data["dietary_tags"] and "update" in response_data["dietary_tags"]
 
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=other_user_id)
-    mock_service.get_recipe_by_id.return_value = existing_recipe # Recipe found
-    mock_service.delete_recipe.return_value = False # Deletion fails at service level (auth)
+        mock_service.get_recipe_by_id.assert_not_called()
+        calls = mock_service.update_recipe.call_args_list
+        assert len(calls) == 1
 
-    response = client.delete(f"/api/v1/recipes/{recipe_id}")
+        call_args = calls[0].kwargs
+        assert isinstance(call_args['recipe_in'], RecipeUpdate)
+        assert call_args['recipe_in'].title is None # Title was not part of the update payload
+        assert call_args['recipe_in'].description == update_payload_dict["description"]
+        assert call_args['recipe_in'].dietary_tags == update_payload_dict["dietary_tags"]
+        assert call_args['user_id'] == current_user.id
+        assert call_args['recipe_id'] == recipe_id
 
-    assert response.status_code == status.HTTP_403_FORBIDDEN
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.delete_recipe.assert_called_once_with(recipe_id=recipe_id, user_id=current_user.id)
+@pytest.mark.asyncio(loop_scope="class")
+class TestDeleteRecipe:
+    """DELETE /recipes/{recipe_id}"""
 
-# --- Additional Test Cases for Robustness ---
+    async def test_delete_recipe_success(self, client_and_mock_service, recipe_public):
+        client, mock_service, current_user = client_and_mock_service
+        recipe_id = recipe_public.id
 
-def test_list_recipes_pagination_params(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
+        mock_service.delete_recipe.return_value = None # Deletion successful at service level
 
-    recipes_list = [create_sample_recipe_public()] # Dummy list
-    # Ensure pagination meta reflects requested params
-    pagination_meta = PaginationMeta(total_items=1, total_pages=1, current_page=5, limit=50)
-    mock_service.get_recipes_list.return_value = (recipes_list, pagination_meta)
+        response = await client.delete(f"/api/v1/recipes/{recipe_id}")
 
-    response = client.get("/api/v1/recipes/?page=5&limit=50")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        # The service checks existence and ownership itself; no separate lookup
+        mock_service.get_recipe_by_id.assert_not_called()
+        mock_service.delete_recipe.assert_called_once_with(recipe_id=recipe_id, user_id=current_user.id)
 
-    assert response.status_code == status.HTTP_200_OK
-    mock_service.get_recipes_list.assert_called_once_with(page=5, limit=50)
-    response_data = response.json()
-    assert response_data["pagination"]["current_page"] == 5
-    assert response_data["pagination"]["limit"] == 50
 
 
-def test_create_recipe_with_all_optional_fields(client_and_mock_service):
-    client, mock_service, current_user = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    recipe_create_data = {
-        "title": "Recipe With All Opts",
-        "description": "Desc for all opts",
-        "ingredients": [{"name": "Opt Ing", "quantity": "1", "unit": "g"}],
-        "instructions": "Opt instructions.",
-        "cooking_time_minutes": 20,
-        "difficulty": "Easy",
-        "nutritional_info": {"calories": "100kcal", "protein": "10g"}, # Optional
-        "image_url": "http://example.com/optional.jpg", # Optional
-        "tags": ["optional_tag"]
-    }
+@pytest.mark.asyncio(loop_scope="class")
+class TestEndpointErrors:
+    """Not found, forbidden and unexpected-error handling shared by the endpoints."""
 
-    expected_recipe_public = RecipePublic(
-        id=recipe_id,
-        user_id=current_user.id,
-        **recipe_create_data # All fields from create_data are in public model
+    # get 404s when the lookup finds nothing; update and delete when the service says the recipe is missing.
+    @pytest.mark.parametrize(
+        "method,body,service_attr",
+        [
+            ("GET", None, "get_recipe_by_id"),
+            ("PUT", orjson.dumps({"title": "Won't Update"}), "update_recipe"),
+            ("DELETE", None, "delete_recipe"),
+        ],
+        ids=["get", "update", "delete"],
     )
-    mock_service.create_recipe.return_value = expected_recipe_public
-
-    response = client.post("/api/v1/recipes/", json=recipe_create_data)
-
-    assert response.status_code == status.HTTP_201_CREATED
-    response_data = response.json()
-    assert response_data["title"] == recipe_create_data["title"]
-    assert response_data["nutritional_info"]["protein"] == "10g"
-    assert response_data["image_url"] == recipe_create_data["image_url"]
-
-    mock_service.create_recipe.assert_called_once()
-    call_args = mock_service.create_recipe.call_args[1]
-    assert isinstance(call_args['recipe_in'], RecipeCreate)
-    assert call_args['recipe_in'].nutritional_info == recipe_create_data["nutritional_info"]
-    assert call_args['recipe_in'].image_url == recipe_create_data["image_url"]
-
-
-def test_update_recipe_partial_data(client_and_mock_service):
-    client, mock_service, current_user = client_and_mock_service
-    recipe_id = uuid.uuid4()
-
-    update_payload_dict = {"description": "New partial description", "tags": ["partial", "update"]}
-
-    existing_recipe = create_sample_recipe_public(
-        recipe_id=recipe_id, user_id=current_user.id,
-        title="Original Title for Partial Update", description="Old description", tags=["old_tag"]
+    async def test_recipe_endpoint_not_found(self, client_and_mock_service, method, body, service_attr):
+        client, mock_service, _ = client_and_mock_service
+        recipe_id = uuid.uuid4()
+
+        if method == "GET":
+            mock_service.get_recipe_by_id.return_value = None
+        else:
+            getattr(mock_service, service_attr).side_effect = RecipeNotFoundException("missing")
+
+        response = await client.request(method, f"/api/v1/recipes/{recipe_id}", content=body, headers=_JSON_HEADERS)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert parse_json(response)["detail"] == "Recipe not found"
+        getattr(mock_service, service_attr).assert_called_once()
+        if method != "GET":
+            mock_service.get_recipe_by_id.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "method,body,service_attr,detail",
+        [
+            ("PUT", orjson.dumps({"title": "Attempted Update"}), "update_recipe", "Not authorized to update this recipe"),
+            ("DELETE", None, "delete_recipe", "Not authorized to delete this recipe"),
+        ],
+        ids=["update", "delete"],
     )
-
-    # Expected result after partial update
-    updated_recipe_public = RecipePublic(
-        id=recipe_id, user_id=current_user.id,
-        title=existing_recipe.title, # Title should remain unchanged
-        description=update_payload_dict["description"], # Description updated
-        tags=update_payload_dict["tags"], # Tags updated
-        # Other fields remain from 'existing_recipe'
-        ingredients=existing_recipe.ingredients,
-        instructions=existing_recipe.instructions,
-        cooking_time_minutes=existing_recipe.cooking_time_minutes,
-        difficulty=existing_recipe.difficulty,
-        nutritional_info=existing_recipe.nutritional_info,
-        image_url=existing_recipe.image_url,
+    async def test_recipe_endpoint_forbidden(self, client_and_mock_service, recipe_public, method, body, service_attr, detail):
+        client, mock_service, current_user = client_and_mock_service
+        # The factory gives the recipe a random creator, i.e. another user
+        recipe_id = recipe_public.id
+
+        getattr(mock_service, service_attr).side_effect = RecipeForbiddenException("not the creator")
+
+        response = await client.request(method, f"/api/v1/recipes/{recipe_id}", content=body, headers=_JSON_HEADERS)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert parse_json(response)["detail"] == detail
+        mock_service.get_recipe_by_id.assert_not_called()
+
+        service_method = getattr(mock_service, service_attr)
+        calls = service_method.call_args_list
+        assert len(calls) == 1
+        call_args = calls[0].kwargs
+        assert call_args['recipe_id'] == recipe_id
+        assert call_args['user_id'] == current_user.id
+        if body is not None:
+            assert isinstance(call_args['recipe_in'], RecipeUpdate)
+            assert call_args['recipe_in'].title == orjson.loads(body)["title"]
+
+    # Database errors reach the app-level handlers, not per-route ones.
+    @pytest.mark.parametrize(
+        "method,url,body,service_attr",
+        [
+            ("POST", "/api/v1/recipes/", orjson.dumps(create_recipe_payload(title="Error Recipe")), "create_recipe"),
+            ("GET", f"/api/v1/recipes/{_RECIPE_ID}", None, "get_recipe_by_id"),
+            ("GET", "/api/v1/recipes/?page=1&limit=10", None, "get_recipes_list"),
+            ("PUT", f"/api/v1/recipes/{_RECIPE_ID}", orjson.dumps({"title": "Error Update"}), "update_recipe"),
+            ("DELETE", f"/api/v1/recipes/{_RECIPE_ID}", None, "delete_recipe"),
+        ],
+        ids=["create", "get", "list", "update", "delete"],
     )
+    @pytest.mark.parametrize(
+        "error,expected_status,expected_detail",
+        [
+            (SQLAlchemyError("Simulated database error"), status.HTTP_500_INTERNAL_SERVER_ERROR, "An unexpected database error occurred."),
+            (IntegrityError("INSERT ...", {}, Exception("duplicate key")), status.HTTP_409_CONFLICT, "The request conflicts with existing data."),
+        ],
+        ids=["database_error", "integrity_error"],
+    )
+    async def test_recipe_endpoint_database_error(self, client_and_mock_service, method, url, body, service_attr, error, expected_status, expected_detail):
+        client, mock_service, _ = client_and_mock_service
 
-    mock_service.get_recipe_by_id.return_value = existing_recipe
-    mock_service.update_recipe.return_value = updated_recipe_public
-
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_payload_dict)
-
-    assert response.status_code == status.HTTP_200_OK
-    response_data = response.json()
-    assert response_data["title"] == existing_recipe.title # Title should not have changed
-    assert response_data["description"] == "New partial description"
-    assert "partial" in response_data["tags"] and "update" in response_data["tags"]
-
-    mock_service.get_recipe_by_id.assert_called_once_with(recipe_id=recipe_id)
-    mock_service.update_recipe.assert_called_once()
-
-    call_args = mock_service.update_recipe.call_args[1]
-    assert isinstance(call_args['recipe_in'], RecipeUpdate)
-    assert call_args['recipe_in'].title is None # Title was not part of the update payload
-    assert call_args['recipe_in'].description == update_payload_dict["description"]
-    assert call_args['recipe_in'].tags == update_payload_dict["tags"]
-    assert call_args['user_id'] == current_user.id
-    assert call_args['recipe_id'] == recipe_id
-
-# --- Server Error Handling Tests (Endpoint Level) ---
-# These tests verify that the generic exception handler in the endpoint works.
-
-def test_create_recipe_endpoint_server_error(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_create_data = { "title": "Error Recipe", "description": "...", "ingredients": [{"name":"i","quantity":"1","unit":"pc"}], "instructions": "...", "cooking_time_minutes": 1, "difficulty": "Easy"}
-
-    mock_service.create_recipe.side_effect = Exception("Simulated unexpected service error")
-
-    response = client.post("/api/v1/recipes/", json=recipe_create_data)
-
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred while creating the recipe" in response.json()["detail"].lower()
-
-
-def test_get_recipe_endpoint_server_error(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-    recipe_id = uuid.uuid4()
-
-    mock_service.get_recipe_by_id.side_effect = Exception("Simulated unexpected service error")
-
-    response = client.get(f"/api/v1/recipes/{recipe_id}")
-
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred while retrieving the recipe" in response.json()["detail"].lower()
-
-
-def test_list_recipes_endpoint_server_error(client_and_mock_service):
-    client, mock_service, _ = client_and_mock_service
-
-    mock_service.get_recipes_list.side_effect = Exception("Simulated unexpected service error")
-
-    response = client.get("/api/v1/recipes/?page=1&limit=10")
-
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred while listing recipes" in response.json()["detail"].lower()
-
-
-def test_update_recipe_endpoint_server_error(client_and_mock_service):
-    client, mock_service, current_user = client_and_mock_service
-    recipe_id = uuid.uuid4()
-    update_data = {"title": "Error Update"}
-
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=current_user.id)
-    mock_service.get_recipe_by_id.return_value = existing_recipe # First check passes
-    mock_service.update_recipe.side_effect = Exception("Simulated unexpected service error")
-
-    response = client.put(f"/api/v1/recipes/{recipe_id}", json=update_data)
-
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred while updating the recipe" in response.json()["detail"].lower()
-
-
-def test_delete_recipe_endpoint_server_error(client_and_mock_service):
-    client, mock_service, current_user = client_and_mock_service
-    recipe_id = uuid.uuid4()
-
-    existing_recipe = create_sample_recipe_public(recipe_id=recipe_id, user_id=current_user.id)
-    mock_service.get_recipe_by_id.return_value = existing_recipe # First check passes
-    mock_service.delete_recipe.side_effect = Exception("Simulated unexpected service error")
-
-    response = client.delete(f"/api/v1/recipes/{recipe_id}")
+        getattr(mock_service, service_attr).side_effect = error
 
-    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "unexpected error occurred while deleting the recipe" in response.json()["detail"].lower()
+        response = await client.request(method, url, content=body, headers=_JSON_HEADERS)
 
-```
+        assert response.status_code == expected_status
+        assert parse_json(response)["detail"] == expected_detail
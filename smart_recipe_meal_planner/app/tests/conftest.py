@@ -0,0 +1,242 @@
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+
+import factory
+import orjson
+import pytest
+import pytest_asyncio
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from filelock import FileLock
+from httpx import ASGITransport, AsyncClient
+from pydantic import HttpUrl
+from pytest_factoryboy import register
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api.v1.dependencies import (
+    get_current_active_user,
+    get_db,
+    get_recipe_service,
+    get_spoonacular_client,
+)
+from app.clients.spoonacular_client import SpoonacularClient
+from app.db.models import Base
+from app.main import app
+
+from app.models.common_schemas import (
+    IngredientUsagePublic,
+    InstructionStepPublic,
+    RecipeIngredientLink,
+)
+from app.models.recipe_schemas import RecipePublic
+
+# Integration tests run against a real Postgres database named by this
+# variable; they are skipped when it is not set.
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+# Registered as the `recipe_public` and `recipe_public_factory` fixtures.
+# Tests override attributes with e.g.
+# @pytest.mark.parametrize("recipe_public__title", ["Old Title"]).
+# Instances are built with model_construct(): they are only ever mock return
+# values serialized by the response model, so validating them is wasted work.
+@register
+class RecipePublicFactory(factory.Factory):
+    class Meta:
+        model = RecipePublic
+
+    @classmethod
+    def _create(cls, model_class, *args, **kwargs):
+        return model_class.model_construct(**kwargs)
+
+    id = factory.LazyFunction(uuid.uuid4)
+    title = "Test Recipe"
+    description = "A delicious test recipe"
+    cook_time_minutes = 30
+    difficulty_level = "easy"
+    dietary_tags = factory.LazyFunction(lambda: ["test", "easy"])
+    image_url = factory.LazyFunction(lambda: HttpUrl("http://example.com/image.jpg"))
+    created_by_user_id = factory.LazyFunction(uuid.uuid4)
+    created_at = factory.LazyFunction(_utcnow)
+    updated_at = factory.LazyFunction(_utcnow)
+    instructions = factory.LazyFunction(
+        lambda: [InstructionStepPublic.model_construct(step_number=1, instruction="Mix and bake.")]
+    )
+    recipe_ingredients = factory.LazyFunction(
+        lambda: [
+            IngredientUsagePublic.model_construct(
+                ingredient=RecipeIngredientLink.model_construct(
+                    id=uuid.uuid4(), name="test ingredient", category="Test"
+                ),
+                quantity=1.0,
+                unit="cup",
+            )
+        ]
+    )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def openapi_schema(tmp_path_factory):
+    """Builds the app's OpenAPI schema once per test run.
+
+    Without xdist the schema is generated eagerly in this process. Under
+    xdist the first worker generates it and writes it next to the shared
+    basetemp; the other workers load that file instead of regenerating it.
+    """
+    if not os.environ.get("PYTEST_XDIST_WORKER"):
+        return app.openapi()
+
+    shared_dir = tmp_path_factory.getbasetemp().parent
+    schema_file = shared_dir / "openapi.json"
+    with FileLock(str(schema_file) + ".lock"):
+        if schema_file.is_file():
+            app.openapi_schema = orjson.loads(schema_file.read_bytes())
+        else:
+            schema_file.write_bytes(orjson.dumps(app.openapi()))
+    return app.openapi_schema
+
+
+@pytest.fixture(scope="session", autouse=True)
+def warm_endpoints(openapi_schema):
+    """Sends one throwaway request to every API route before the first test.
+
+    This builds the middleware stack and exercises each route's request
+    parsing, dependency solving and validators once, so the first real test
+    of an endpoint only pays for its own request. The service and user
+    dependencies are stubbed out for the duration so nothing reaches the
+    database; responses and errors are ignored.
+    """
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides[get_recipe_service] = lambda: None
+    app.dependency_overrides[get_current_active_user] = lambda: None
+    try:
+        client = TestClient(app, raise_server_exceptions=False)
+        for route in app.routes:
+            if not isinstance(route, APIRoute):
+                continue
+            path = re.sub(r"\{[^}]+\}", "0", route.path)
+            for method in route.methods:
+                try:
+                    client.request(method, path, json={})
+                except Exception:
+                    pass
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(previous)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+def _worker_database_url(url: str):
+    """Gives each xdist worker its own database, created on first use.
+
+    Workers would otherwise create and drop the same schema concurrently.
+    Without xdist the URL is returned unchanged.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if not worker:
+        return url
+    base_url = make_url(url)
+    worker_url = base_url.set(database=f"{base_url.database}_{worker}")
+    admin_engine = create_engine(base_url, isolation_level="AUTOCOMMIT")
+    with admin_engine.connect() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": worker_url.database}
+        ).scalar()
+        if not exists:
+            conn.execute(text(f'CREATE DATABASE "{worker_url.database}"'))
+    admin_engine.dispose()
+    return worker_url
+
+
+def _drop_worker_database(url: str) -> None:
+    """Drops the database _worker_database_url created for this xdist worker, if any."""
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if not worker:
+        return
+    base_url = make_url(url)
+    admin_engine = create_engine(base_url, isolation_level="AUTOCOMMIT")
+    with admin_engine.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{base_url.database}_{worker}"'))
+    admin_engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def db_engine():
+    """Creates the async engine and the schema once per test run (per worker under xdist).
+
+    TEST_DATABASE_URL is a plain postgresql:// URL; the per-worker database is
+    created over it synchronously, then the app's asyncpg driver is used. It is
+    dropped again once the engine is disposed.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    url = make_url(_worker_database_url(TEST_DATABASE_URL)).set(drivername="postgresql+asyncpg")
+    engine = create_async_engine(url, pool_pre_ping=True)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield engine
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        await engine.dispose()
+        _drop_worker_database(TEST_DATABASE_URL)
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def db_session(db_engine):
+    """A session joined to an outer transaction that is rolled back after each test.
+
+    The app's get_db dependency yields this same session. Commits made by the
+    code under test only release a SAVEPOINT, so nothing a test writes is
+    visible to the next one and the schema never has to be recreated.
+    """
+    async with db_engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(
+            bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False
+        )
+        app.dependency_overrides[get_db] = lambda: session
+        yield session
+        app.dependency_overrides.pop(get_db, None)
+        await session.close()
+        await transaction.rollback()
+
+
+@pytest.fixture(scope="session")
+def dummy_user_id():
+    return uuid.uuid4()
+
+
+@pytest.fixture(scope="session")
+def auth_headers(dummy_user_id):
+    # The placeholder auth dependency ignores the token; this only mirrors
+    # what a real client would send.
+    return {"Authorization": f"Bearer dummytoken-for-user-{dummy_user_id}"}
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def spoonacular_client():
+    """A real SpoonacularClient injected into the app once per run.
+
+    Its HTTP traffic is expected to be mocked at the transport layer with
+    respx, so the client's request building and error handling still run.
+    """
+    spoonacular_client = SpoonacularClient(api_key="test-api-key")
+    app.dependency_overrides[get_spoonacular_client] = lambda: spoonacular_client
+    yield spoonacular_client
+    app.dependency_overrides.pop(get_spoonacular_client, None)
+    await spoonacular_client.close()
@@ -1,253 +1,246 @@
-import unittest
 import logging
+
+import pytest
+
 from app.services.recipe_mapper import map_spoonacular_data_to_dict
-from app.models.recipe_schemas import InstructionStepCreate # For validating instruction structure
-
-# Configure logger for capturing logs during tests if needed for specific assertions
-# For unittest, self.assertLogs can be used. For pytest, caplog fixture.
-# Here, we'll primarily check for behavior like skipping items,
-# but direct log assertion can be added if critical.
-
-class TestRecipeMapper(unittest.TestCase):
-
-    def test_map_full_recipe_data_successfully(self):
-        spoonacular_data = {
-            "id": 123,
-            "title": "Test Recipe Deluxe",
-            "image": "http://example.com/image.jpg",
-            "sourceUrl": "http://example.com/source_recipe",
-            "preparationMinutes": 15,
-            "cookingMinutes": 25,
-            "servings": 4,
-            "difficulty": "medium", # This is not directly mapped, default used if not spoonacular_data.get("difficulty")
-            "cuisines": ["Italian", "Fusion"],
-            "diets": ["vegetarian", "low-fodmap"],
-            "summary": "<p>This is a <b>fantastic</b> recipe with <a href='#'>links</a> and <html>markup</html>.</p>",
-            "extendedIngredients": [
-                {
-                    "nameClean": "Tomato",
-                    "name": "tomatoes", # nameClean should be preferred
-                    "amount": 2.0,
-                    "unit": "pieces",
-                    "original": "2 large tomatoes, diced",
-                    "aisle": "Produce;Vegetables",
-                    "nutrition": {
-                        "nutrients": [{"name": "Calories", "amount": 60.0, "unit": "kcal"}] # For 2 pieces
-                    }
-                },
-                {
-                    "nameClean": "Pasta",
-                    "amount": 1.0, # Calories per unit test (amount is 1)
-                    "unit": "serving (100g)", # Test complex unit
-                    "aisle": "Pasta and Rice",
-                    "meta": ["organic"], # Should be part of preparation_note if original is missing
-                    "nutrition": {
-                        "nutrients": [{"name": "Calories", "amount": 350.0, "unit": "kcal"}] # For 1 serving
-                    }
-                },
-                {
-                    "nameClean": "Olive Oil",
-                    "amount": 2.0,
-                    "unit": "tbsp",
-                    "aisle": "Oil, Vinegar, Salad Dressing",
-                    # Missing nutrition for this ingredient
-                },
-                { # Ingredient to be skipped (missing quantity)
-                    "nameClean": "Salt",
-                    "unit": "pinch"
-                },
-                { # Ingredient to be skipped (missing name)
-                    "amount": 1.0,
-                    "unit": "clove"
-                },
-                 { # Ingredient with no aisle
-                    "nameClean": "Secret Spice",
-                    "amount": 1.0,
-                    "unit": "tsp",
-                    "original": "1 tsp secret spice"
-                    # No aisle, no nutrition
-                }
-            ],
-            "analyzedInstructions": [
-                {
-                    "name": "Main Steps",
-                    "steps": [
-                        {"number": 1, "step": "Boil water for pasta."},
-                        {"number": 2, "step": "Dice tomatoes."},
-                        {"number": 3, "step": "Cook everything."}
-                    ]
-                },
-                { # Invalid step in this section
-                    "name": "Invalid Section",
-                    "steps": [
-                        {"number": 1, "instruction": "This is not a 'step' field"} # Invalid
-                    ]
-                }
-            ],
+
+MAPPER_LOGGER = "app.services.recipe_mapper"
+
+
+@pytest.fixture(autouse=True)
+def quiet_mapper_logger():
+    """Drops mapper log records unless a test opts in through mapper_log.
+
+    Most tests don't look at the logs, so there's no point creating records
+    and running the handlers for them.
+    """
+    logger = logging.getLogger(MAPPER_LOGGER)
+    previous_level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    yield
+    logger.setLevel(previous_level)
+
+
+class _RecordSink(logging.Handler):
+    """Keeps raw LogRecords; messages are only formatted when a test reads them."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture(scope="module")
+def mapper_log_sink():
+    """One handler on the mapper logger for the whole module."""
+    logger = logging.getLogger(MAPPER_LOGGER)
+    sink = _RecordSink()
+    logger.addHandler(sink)
+    yield sink
+    logger.removeHandler(sink)
+
+
+@pytest.fixture
+def mapper_log(mapper_log_sink):
+    """Returns a callable giving the messages the mapper logged (INFO and up) during the test."""
+    logging.getLogger(MAPPER_LOGGER).setLevel(logging.INFO)  # quiet_mapper_logger restores it
+    start = len(mapper_log_sink.records)
+    return lambda: [record.getMessage() for record in mapper_log_sink.records[start:]]
+
+
+def assert_log_contains(messages, *needles):
+    """Asserts each needle occurs in at least one of the captured log messages."""
+    joined = "\n".join(messages)
+    for needle in needles:
+        assert needle in joined
+
+
+# The mapper only reads its input, so the payload is built once and shared.
+_FULL_RECIPE_PAYLOAD = {
+    "id": 123,
+    "title": "Test Recipe Deluxe",
+    "image": "http://example.com/image.jpg",
+    "sourceUrl": "http://example.com/source_recipe",
+    "preparationMinutes": 15,
+    "cookingMinutes": 25,
+    "servings": 4,
+    "difficulty": "medium", # This is not directly mapped, default used if not spoonacular_data.get("difficulty")
+    "cuisines": ["Italian", "Fusion"],
+    "diets": ["vegetarian", "low-fodmap"],
+    "summary": "<p>This is a <b>fantastic</b> recipe with <a href='#'>links</a> and <html>markup</html>.</p>",
+    "extendedIngredients": [
+        {
+            "nameClean": "Tomato",
+            "name": "tomatoes", # nameClean should be preferred
+            "amount": 2.0,
+            "unit": "pieces",
+            "original": "2 large tomatoes, diced",
+            "aisle": "Produce;Vegetables",
             "nutrition": {
-                "nutrients": [
-                    {"name": "Calories", "amount": 800.0, "unit": "kcal"},
-                    {"name": "Protein", "amount": 30.0, "unit": "g"},
-                    {"name": "Fat", "amount": 25.0, "unit": "g"},
-                    {"name": "Net Carbohydrates", "amount": 100.0, "unit": "g"} # Test "Net Carbohydrates"
-                ]
+                "nutrients": [{"name": "Calories", "amount": 60.0, "unit": "kcal"}] # For 2 pieces
+            }
+        },
+        {
+            "nameClean": "Pasta",
+            "amount": 1.0, # Calories per unit test (amount is 1)
+            "unit": "serving (100g)", # Test complex unit
+            "aisle": "Pasta and Rice",
+            "meta": ["organic"], # Should be part of preparation_note if original is missing
+            "nutrition": {
+                "nutrients": [{"name": "Calories", "amount": 350.0, "unit": "kcal"}] # For 1 serving
             }
+        },
+        {
+            "nameClean": "Olive Oil",
+            "amount": 2.0,
+            "unit": "tbsp",
+            "aisle": "Oil, Vinegar, Salad Dressing",
+            # Missing nutrition for this ingredient
+        },
+        { # Ingredient to be skipped (missing quantity)
+            "nameClean": "Salt",
+            "unit": "pinch"
+        },
+        { # Ingredient to be skipped (missing name)
+            "amount": 1.0,
+            "unit": "clove"
+        },
+         { # Ingredient with no aisle
+            "nameClean": "Secret Spice",
+            "amount": 1.0,
+            "unit": "tsp",
+            "original": "1 tsp secret spice"
+            # No aisle, no nutrition
         }
-        spoonacular_id_val = 123
-
-        with self.assertLogs(logger='app.services.recipe_mapper', level='INFO') as cm:
-            mapped_data = map_spoonacular_data_to_dict(spoonacular_data, spoonacular_id_val)
-
-        # Basic assertions
-        self.assertEqual(mapped_data["title"], "Test Recipe Deluxe")
-        self.assertEqual(mapped_data["image_url"], "http://example.com/image.jpg")
-        self.assertEqual(mapped_data["source_url"], "http://example.com/source_recipe")
-        self.assertEqual(mapped_data["prep_time_minutes"], 15)
-        self.assertEqual(mapped_data["cook_time_minutes"], 25)
-        self.assertEqual(mapped_data["servings"], 4)
-        self.assertEqual(mapped_data["difficulty_level"], "medium") # Default or from data
-        self.assertEqual(mapped_data["cuisine_type"], "Italian")
-        self.assertListEqual(mapped_data["dietary_tags"], ["vegetarian", "low-fodmap"])
-        self.assertEqual(mapped_data["spoonacular_id"], spoonacular_id_val)
-
-        # Description HTML Stripping
-        self.assertEqual(mapped_data["description"], "This is a fantastic recipe with links and markup.")
-
-        # Ingredients Mapping
-        self.assertEqual(len(mapped_data["ingredients_data_temp"]), 4) # tomato, pasta, olive oil, secret spice (salt/no-name skipped)
-
-        ing1_tomato = mapped_data["ingredients_data_temp"][0]
-        self.assertEqual(ing1_tomato["name"], "tomato")
-        self.assertEqual(ing1_tomato["quantity"], 2.0)
-        self.assertEqual(ing1_tomato["unit"], "pieces")
-        self.assertEqual(ing1_tomato["preparation_note"], "2 large tomatoes, diced")
-        self.assertEqual(ing1_tomato["category"], "Produce")
-        self.assertIsNone(ing1_tomato["calories_per_unit"]) # Amount was 2.0
-
-        ing2_pasta = mapped_data["ingredients_data_temp"][1]
-        self.assertEqual(ing2_pasta["name"], "pasta")
-        self.assertEqual(ing2_pasta["quantity"], 1.0)
-        self.assertEqual(ing2_pasta["unit"], "serving (100g)")
-        self.assertEqual(ing2_pasta["preparation_note"], "organic") # from meta
-        self.assertEqual(ing2_pasta["category"], "Pasta and Rice")
-        self.assertEqual(ing2_pasta["calories_per_unit"], 350.0) # Amount was 1.0
-
-        ing3_olive_oil = mapped_data["ingredients_data_temp"][2]
-        self.assertEqual(ing3_olive_oil["name"], "olive oil")
-        self.assertEqual(ing3_olive_oil["category"], "Oil, Vinegar, Salad Dressing")
-        self.assertIsNone(ing3_olive_oil["calories_per_unit"]) # Missing nutrition data
-
-        ing4_secret_spice = mapped_data["ingredients_data_temp"][3]
-        self.assertEqual(ing4_secret_spice["name"], "secret spice")
-        self.assertIsNone(ing4_secret_spice["category"]) # Missing aisle
-        self.assertIsNone(ing4_secret_spice["calories_per_unit"])
-
-
-        # Check logs for skipped ingredients and calorie calculation notes
-        # Example: self.assertIn("Skipping ingredient 'Salt' due to missing quantity", cm.output[0])
-        self.assertTrue(any("Skipping ingredient 'Salt' due to missing quantity" in log_msg for log_msg in cm.output))
-        self.assertTrue(any("Skipping ingredient with no name" in log_msg for log_msg in cm.output))
-        self.assertTrue(any("Ingredient 'tomato': Calorie data present for quantity 2.0 pieces but not directly per single unit." in log_msg for log_msg in cm.output))
-
-
-        # Instructions Mapping
-        self.assertEqual(len(mapped_data["instructions_data"]), 3)
-        self.assertIsInstance(mapped_data["instructions_data"][0], dict) # Was InstructionStepCreate.model_dump()
-        self.assertEqual(mapped_data["instructions_data"][0]["step_number"], 1)
-        self.assertEqual(mapped_data["instructions_data"][0]["instruction"], "Boil water for pasta.")
-        self.assertEqual(mapped_data["instructions_data"][2]["instruction"], "Cook everything.")
-        # Check log for skipped invalid instruction
-        self.assertTrue(any("Skipping invalid instruction step" in log_msg for log_msg in cm.output))
-
-
-        # Nutritional Information Mapping
-        self.assertEqual(mapped_data["calories"], 800.0)
-        self.assertEqual(mapped_data["protein"], 30.0)
-        self.assertEqual(mapped_data["fat"], 25.0)
-        self.assertEqual(mapped_data["carbohydrates"], 100.0)
-
-
-    def test_map_recipe_with_missing_prep_cook_uses_readyinminutes(self):
-        spoonacular_data = {
+    ],
+    "analyzedInstructions": [
+        {
+            "name": "Main Steps",
+            "steps": [
+                {"number": 1, "step": "Boil water for pasta."},
+                {"number": 2, "step": "Dice tomatoes."},
+                {"number": 3, "step": "Cook everything."}
+            ]
+        },
+        { # Invalid step in this section
+            "name": "Invalid Section",
+            "steps": [
+                {"number": 1, "instruction": "This is not a 'step' field"} # Invalid
+            ]
+        }
+    ],
+    "nutrition": {
+        "nutrients": [
+            {"name": "Calories", "amount": 800.0, "unit": "kcal"},
+            {"name": "Protein", "amount": 30.0, "unit": "g"},
+            {"name": "Fat", "amount": 25.0, "unit": "g"},
+            {"name": "Net Carbohydrates", "amount": 100.0, "unit": "g"} # Test "Net Carbohydrates"
+        ]
+    }
+}
+
+_EXPECTED_DESCRIPTION = "This is a fantastic recipe with links and markup."
+
+
+def test_map_full_recipe_data_successfully(mapper_log):
+    spoonacular_id_val = 123
+
+    mapped_data = map_spoonacular_data_to_dict(_FULL_RECIPE_PAYLOAD, spoonacular_id_val)
+
+    # Basic assertions
+    assert mapped_data["title"] == "Test Recipe Deluxe"
+    assert mapped_data["image_url"] == "http://example.com/image.jpg"
+    assert mapped_data["source_url"] == "http://example.com/source_recipe"
+    assert mapped_data["prep_time_minutes"] == 15
+    assert mapped_data["cook_time_minutes"] == 25
+    assert mapped_data["servings"] == 4
+    assert mapped_data["difficulty_level"] == "medium" # Default or from data
+    assert mapped_data["cuisine_type"] == "Italian"
+    assert mapped_data["dietary_tags"] == ["vegetarian", "low-fodmap"]
+    assert mapped_data["spoonacular_id"] == spoonacular_id_val
+
+    # Description HTML Stripping
+    assert mapped_data["description"] == _EXPECTED_DESCRIPTION
+
+    # Ingredients Mapping
+    assert len(mapped_data["ingredients_data_temp"]) == 4 # tomato, pasta, olive oil, secret spice (salt/no-name skipped)
+
+    ing1_tomato = mapped_data["ingredients_data_temp"][0]
+    assert ing1_tomato.name == "tomato"
+    assert ing1_tomato.quantity == 2.0
+    assert ing1_tomato.unit == "pieces"
+    assert ing1_tomato.preparation_note == "2 large tomatoes, diced"
+    assert ing1_tomato.category == "Produce"
+    assert ing1_tomato.calories_per_unit is None # Amount was 2.0
+
+    ing2_pasta = mapped_data["ingredients_data_temp"][1]
+    assert ing2_pasta.name == "pasta"
+    assert ing2_pasta.quantity == 1.0
+    assert ing2_pasta.unit == "serving (100g)"
+    assert ing2_pasta.preparation_note == "organic" # from meta
+    assert ing2_pasta.category == "Pasta and Rice"
+    assert ing2_pasta.calories_per_unit == 350.0 # Amount was 1.0
+
+    ing3_olive_oil = mapped_data["ingredients_data_temp"][2]
+    assert ing3_olive_oil.name == "olive oil"
+    assert ing3_olive_oil.category == "Oil, Vinegar, Salad Dressing"
+    assert ing3_olive_oil.calories_per_unit is None # Missing nutrition data
+
+    ing4_secret_spice = mapped_data["ingredients_data_temp"][3]
+    assert ing4_secret_spice.name == "secret spice"
+    assert ing4_secret_spice.category is None # Missing aisle
+    assert ing4_secret_spice.calories_per_unit is None
+
+    # Check logs for skipped ingredients and instructions, and calorie calculation notes
+    assert_log_contains(
+        mapper_log(),
+        "Skipping ingredient 'Salt' due to missing quantity",
+        "Skipping ingredient with no name",
+        "Ingredient 'tomato': Calorie data present for quantity 2.0 pieces but not directly per single unit.",
+        "Skipping invalid instruction step",
+    )
+
+    # Instructions Mapping
+    assert len(mapped_data["instructions_data"]) == 3
+    assert isinstance(mapped_data["instructions_data"][0], dict) # Was InstructionStepCreate.model_dump()
+    assert mapped_data["instructions_data"][0]["step_number"] == 1
+    assert mapped_data["instructions_data"][0]["instruction"] == "Boil water for pasta."
+    assert mapped_data["instructions_data"][2]["instruction"] == "Cook everything."
+
+    # Nutritional Information Mapping
+    assert mapped_data["calories"] == 800.0
+    assert mapped_data["protein"] == 30.0
+    assert mapped_data["fat"] == 25.0
+    assert mapped_data["carbohydrates"] == 100.0
+
+
+# (payload, spoonacular_id, expected top-level fields of the mapped dict)
+FIELD_CASES = [
+    pytest.param(
+        {
             "title": "Quick Dish",
             "readyInMinutes": 20, # Only this time is provided
             "summary": "A very quick dish."
-        }
-        mapped_data = map_spoonacular_data_to_dict(spoonacular_data, 234)
-        self.assertIsNone(mapped_data["prep_time_minutes"])
-        self.assertEqual(mapped_data["cook_time_minutes"], 20) # readyInMinutes should go to cook_time_minutes
-
-    def test_map_instructions_from_plain_text(self):
-        spoonacular_data = {
-            "title": "Simple Instructions",
-            "instructions": "1. Do this. 2. Do that.",
-            "summary": "Easy."
-        }
-        mapped_data = map_spoonacular_data_to_dict(spoonacular_data, 345)
-        self.assertEqual(len(mapped_data["instructions_data"]), 1)
-        self.assertEqual(mapped_data["instructions_data"][0]["step_number"], 1)
-        self.assertEqual(mapped_data["instructions_data"][0]["instruction"], "1. Do this. 2. Do that.")
-
-    def test_map_no_instructions_provided(self):
-        spoonacular_data = {
-            "title": "No Instructions Recipe",
-            "summary": "Figure it out."
-            # No analyzedInstructions, no instructions field
-        }
-        with self.assertLogs(logger='app.services.recipe_mapper', level='WARNING') as cm:
-            mapped_data = map_spoonacular_data_to_dict(spoonacular_data, 456)
-
-        self.assertEqual(len(mapped_data["instructions_data"]), 0)
-        self.assertTrue(any("No instructions mapped" in log_msg for log_msg in cm.output))
-
-    def test_map_ingredient_name_fallback(self):
-        spoonacular_data = {
-            "title": "Ingredient Name Fallback",
-            "summary": "Test.",
-            "extendedIngredients": [{
-                "name": "Regular Name Only", # No nameClean
-                "amount": 1.0,
-                "unit": "item"
-            }]
-        }
-        mapped_data = map_spoonacular_data_to_dict(spoonacular_data, 567)
-        self.assertEqual(len(mapped_data["ingredients_data_temp"]), 1)
-        self.assertEqual(mapped_data["ingredients_data_temp"][0]["name"], "regular name only")
-
-    def test_map_ingredient_preparation_note_fallback(self):
-        spoonacular_data = {
-            "title": "Prep Note Fallback",
-            "summary": "Test.",
-            "extendedIngredients": [{
-                "nameClean": "Test Ing",
-                "amount": 1.0,
-                "unit": "item",
-                # No "original" or "originalString"
-                "meta": ["finely chopped", "rinsed"]
-            }]
-        }
-        mapped_data = map_spoonacular_data_to_dict(spoonacular_data, 678)
-        self.assertEqual(mapped_data["ingredients_data_temp"][0]["preparation_note"], "finely chopped; rinsed")
-
-    def test_missing_title_raises_value_error(self):
-        spoonacular_data = {
-            "id": 789,
-            "summary": "A recipe with no name."
-            # Missing "title"
-        }
-        with self.assertRaisesRegex(ValueError, "Spoonacular data missing 'title'."):
-            map_spoonacular_data_to_dict(spoonacular_data, 789)
-
-    def test_empty_spoonacular_data(self):
-        # Technically, missing title would be caught first.
-        # This tests general resilience, though specific checks for other fields
-        # are implicitly covered by their absence in a minimal valid payload.
-        spoonacular_data = {}
-        with self.assertRaisesRegex(ValueError, "Spoonacular data missing 'title'."):
-            map_spoonacular_data_to_dict(spoonacular_data, 901)
-
-    def test_map_nutrition_various_names(self):
-        spoonacular_data = {
+        },
+        234,
+        # readyInMinutes should go to cook_time_minutes; a plain-text summary is kept as is
+        {"prep_time_minutes": None, "cook_time_minutes": 20, "description": "A very quick dish."},
+        id="ready_in_minutes_fallback",
+    ),
+    pytest.param(
+        {
+            "title": "Scripted Summary",
+            "summary": "<p>a<script>var x=1;</script>b</p><style>p{}</style>Hello &amp; bye",
+        },
+        235,
+        # Script and style contents are not text of the summary
+        {"description": "abHello & bye"},
+        id="summary_script_and_style_dropped",
+    ),
+    pytest.param(
+        {
             "title": "Nutrition Test",
             "summary": "Nutrition.",
             "nutrition": {
@@ -258,14 +251,13 @@ class TestRecipeMapper(unittest.TestCase):
                     # No "Carbohydrates", should be None
                 ]
             }
-        }
-        mapped_data = map_spoonacular_data_to_dict(spoonacular_data, 1001)
-        self.assertEqual(mapped_data["calories"], 100.0)
-        self.assertEqual(mapped_data["protein"], 10.0)
-        self.assertEqual(mapped_data["fat"], 5.0)
-        self.assertIsNone(mapped_data["carbohydrates"])
-
-        spoonacular_data_net_carbs = {
+        },
+        1001,
+        {"calories": 100.0, "protein": 10.0, "fat": 5.0, "carbohydrates": None},
+        id="nutrition_without_carbs",
+    ),
+    pytest.param(
+        {
             "title": "Nutrition Test Net Carbs",
             "summary": "Nutrition.",
             "nutrition": {
@@ -273,11 +265,13 @@ class TestRecipeMapper(unittest.TestCase):
                     {"name": "Net Carbohydrates", "amount": 50.0}, # Only net carbs
                 ]
             }
-        }
-        mapped_data_net = map_spoonacular_data_to_dict(spoonacular_data_net_carbs, 1002)
-        self.assertEqual(mapped_data_net["carbohydrates"], 50.0)
-
-        spoonacular_data_both_carbs = {
+        },
+        1002,
+        {"carbohydrates": 50.0},
+        id="nutrition_net_carbs_only",
+    ),
+    pytest.param(
+        {
             "title": "Nutrition Test Both Carbs",
             "summary": "Nutrition.",
             "nutrition": {
@@ -286,25 +280,117 @@ class TestRecipeMapper(unittest.TestCase):
                     {"name": "Net Carbohydrates", "amount": 55.0}, # Net carbs also present
                 ]
             }
-        }
+        },
+        1003,
         # "Carbohydrates" should be prioritized over "Net Carbohydrates" if both exist
-        mapped_data_both = map_spoonacular_data_to_dict(spoonacular_data_both_carbs, 1003)
-        self.assertEqual(mapped_data_both["carbohydrates"], 60.0)
-
-
-    def test_no_ingredients_mapped_warning(self):
-        spoonacular_data = {
-            "title": "No Ingredients Recipe",
-            "summary": "A recipe with no ingredients listed.",
-            "extendedIngredients": [] # Empty list
-        }
-        with self.assertLogs(logger='app.services.recipe_mapper', level='WARNING') as cm:
-            mapped_data = map_spoonacular_data_to_dict(spoonacular_data, 1101)
-
-        self.assertEqual(len(mapped_data["ingredients_data_temp"]), 0)
-        self.assertTrue(any("No ingredients mapped" in log_msg for log_msg in cm.output))
-
-if __name__ == "__main__":
-    # This allows running the tests directly via `python test_recipe_mapper.py`
-    # For more complex setups or CI, a test runner like pytest or `python -m unittest discover` is common.
-    unittest.main()
+        {"carbohydrates": 60.0},
+        id="nutrition_carbs_beat_net_carbs",
+    ),
+]
+
+
+@pytest.mark.parametrize("spoonacular_data, spoonacular_id_val, expected", FIELD_CASES)
+def test_map_fields(spoonacular_data, spoonacular_id_val, expected):
+    mapped_data = map_spoonacular_data_to_dict(spoonacular_data, spoonacular_id_val)
+    assert {key: mapped_data[key] for key in expected} == expected
+
+
+def test_map_instructions_from_plain_text():
+    spoonacular_data = {
+        "title": "Simple Instructions",
+        "instructions": "1. Do this. 2. Do that.",
+        "summary": "Easy."
+    }
+    mapped_data = map_spoonacular_data_to_dict(spoonacular_data, 345)
+    assert len(mapped_data["instructions_data"]) == 1
+    assert mapped_data["instructions_data"][0]["step_number"] == 1
+    assert mapped_data["instructions_data"][0]["instruction"] == "1. Do this. 2. Do that."
+
+
+@pytest.mark.parametrize(
+    "ingredient, spoonacular_id_val, field, expected",
+    [
+        pytest.param(
+            {
+                "name": "Regular Name Only", # No nameClean
+                "amount": 1.0,
+                "unit": "item"
+            },
+            567, "name", "regular name only",
+            id="name_fallback",
+        ),
+        pytest.param(
+            {
+                "nameClean": "Test Ing",
+                "amount": 1.0,
+                "unit": "item",
+                # No "original" or "originalString"
+                "meta": ["finely chopped", "rinsed"]
+            },
+            678, "preparation_note", "finely chopped; rinsed",
+            id="preparation_note_fallback",
+        ),
+    ],
+)
+def test_map_ingredient_fallbacks(ingredient, spoonacular_id_val, field, expected):
+    spoonacular_data = {
+        "title": "Ingredient Fallback",
+        "summary": "Test.",
+        "extendedIngredients": [ingredient],
+    }
+    mapped_data = map_spoonacular_data_to_dict(spoonacular_data, spoonacular_id_val)
+    assert len(mapped_data["ingredients_data_temp"]) == 1
+    assert getattr(mapped_data["ingredients_data_temp"][0], field) == expected
+
+
+@pytest.mark.parametrize(
+    "spoonacular_data, spoonacular_id_val",
+    [
+        pytest.param(
+            {
+                "id": 789,
+                "summary": "A recipe with no name."
+                # Missing "title"
+            },
+            789,
+            id="missing_title",
+        ),
+        # Technically, missing title would be caught first.
+        # This tests general resilience, though specific checks for other fields
+        # are implicitly covered by their absence in a minimal valid payload.
+        pytest.param({}, 901, id="empty_payload"),
+    ],
+)
+def test_missing_title_raises_value_error(spoonacular_data, spoonacular_id_val):
+    with pytest.raises(ValueError, match="Spoonacular data missing 'title'."):
+        map_spoonacular_data_to_dict(spoonacular_data, spoonacular_id_val)
+
+
+@pytest.mark.parametrize(
+    "spoonacular_data, spoonacular_id_val, mapped_key, warning",
+    [
+        pytest.param(
+            {
+                "title": "No Instructions Recipe",
+                "summary": "Figure it out."
+                # No analyzedInstructions, no instructions field
+            },
+            456, "instructions_data", "No instructions mapped",
+            id="no_instructions",
+        ),
+        pytest.param(
+            {
+                "title": "No Ingredients Recipe",
+                "summary": "A recipe with no ingredients listed.",
+                "extendedIngredients": [] # Empty list
+            },
+            1101, "ingredients_data_temp", "No ingredients mapped",
+            id="no_ingredients",
+        ),
+    ],
+)
+def test_empty_section_warns(mapper_log, spoonacular_data, spoonacular_id_val, mapped_key, warning):
+    mapped_data = map_spoonacular_data_to_dict(spoonacular_data, spoonacular_id_val)
+
+    assert len(mapped_data[mapped_key]) == 0
+    assert_log_contains(mapper_log(), warning)
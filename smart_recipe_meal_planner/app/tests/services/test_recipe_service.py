@@ -1,480 +1,320 @@
+import orjson
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
-from uuid import uuid4
-
-from sqlalchemy.orm import Session
-
-from app.services.recipe_service import RecipeService
-from app.clients.spoonacular_client import SpoonacularClient, SpoonacularException
-from app.models.recipe_schemas import RecipeCreate, RecipePublic
+import pytest_asyncio
+from pathlib import Path
+from types import MappingProxyType
+from unittest.mock import AsyncMock
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.recipe_mapper import NUTRIENT_ALIASES
+from app.services.recipe_service import RecipeService, RecipeNotFoundException, RecipeForbiddenException
+from app.clients.spoonacular_client import SpoonacularClient
+from app.models.recipe_schemas import RecipeCreate, RecipePublic, RecipeUpdate
 from app.db.models.recipe_model import Recipe as DBRecipe
-from app.db.models.user_model import User # Assuming User model is needed for created_by_user_id
-
-# Sample Spoonacular response with nutritional information
-SAMPLE_SPOONACULAR_NUTRITION_RESPONSE = {
-    "id": 12345,
-    "title": "Test Recipe with Nutrition",
-    "image": "http://example.com/image.jpg",
-    "sourceUrl": "http://example.com/source",
-    "readyInMinutes": 30,
-    "servings": 4,
-    "summary": "A delicious test recipe summary.",
-    "cuisines": ["Italian"],
-    "diets": ["vegetarian"],
-    "extendedIngredients": [
-        {"id": 1, "nameClean": "Pasta", "amount": 200, "unit": "g", "original": "200g pasta"},
-        {"id": 2, "nameClean": "Tomato Sauce", "amount": 400, "unit": "g", "original": "400g tomato sauce"},
-    ],
-    "analyzedInstructions": [{
-        "name": "",
-        "steps": [
-            {"number": 1, "step": "Cook pasta."},
-            {"number": 2, "step": "Add sauce."},
-        ]
-    }],
-    "nutrition": {
-        "nutrients": [
-            {"name": "Calories", "amount": 550.0, "unit": "kcal"},
-            {"name": "Protein", "amount": 25.0, "unit": "g"},
-            {"name": "Fat", "amount": 15.0, "unit": "g"},
-            {"name": "Carbohydrates", "amount": 75.0, "unit": "g"},
-            {"name": "Net Carbohydrates", "amount": 70.0, "unit": "g"} # Example of alternative name
-        ]
-    }
-}
-
-# Sample Spoonacular response with MISSING nutritional information
-SAMPLE_SPOONACULAR_NO_NUTRITION_RESPONSE = {
-    "id": 67890,
-    "title": "Test Recipe without Nutrition",
-    "image": "http://example.com/image2.jpg",
-    "sourceUrl": "http://example.com/source2",
-    "readyInMinutes": 20,
-    "servings": 2,
-    "summary": "Another test recipe summary.",
-    "extendedIngredients": [
-        {"id": 3, "nameClean": "Flour", "amount": 100, "unit": "g", "original": "100g flour"},
-    ],
-    "analyzedInstructions": [{
-        "name": "",
-        "steps": [{"number": 1, "step": "Mix ingredients."}]
-    }],
-    "nutrition": { # Nutrition object present, but nutrients array is empty or missing relevant items
-        "nutrients": [
-            {"name": "Fiber", "amount": 5.0, "unit": "g"} # Only non-target nutrient
-        ]
-    }
-}
+from app.db.models.ingredient_model import Ingredient as DBIngredient
+from app.db.models.recipe_ingredient_model import RecipeIngredient as DBRecipeIngredient
+from app.db.models.user_model import User # Recipes need an existing user for created_by_user_id
+
+# Sample Spoonacular recipe responses: one with the nutrients we map (including both
+# "Carbohydrates" and "Net Carbohydrates"), one whose nutrients include none of them.
+# Read-only views so the service can't change them for later tests.
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+SAMPLE_SPOONACULAR_NUTRITION_RESPONSE = MappingProxyType(
+    orjson.loads((FIXTURES_DIR / "spoonacular_recipe_with_nutrition.json").read_bytes())
+)
+SAMPLE_SPOONACULAR_NO_NUTRITION_RESPONSE = MappingProxyType(
+    orjson.loads((FIXTURES_DIR / "spoonacular_recipe_no_nutrition.json").read_bytes())
+)
+
+
+# These tests run the service against the real database through the shared
+# db_session fixture (app/tests/conftest.py): each test's writes are rolled
+# back afterwards. They are skipped when TEST_DATABASE_URL is not set.
+# They share the session's event loop rather than getting a new one each.
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+# Fixed IDs: every test's rows are rolled back, so they never collide.
+USER_ID = UUID(int=1)
+INGREDIENT_ID = UUID(int=2)
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def user(db_session: AsyncSession) -> User:
+    db_user = User(id=USER_ID, email="service-user@example.com", hashed_password="x")
+    db_session.add(db_user)
+    await db_session.flush()
+    return db_user
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def ingredient(db_session: AsyncSession) -> DBIngredient:
+    db_ingredient = DBIngredient(id=INGREDIENT_ID, name="test ingredient", category="Test Category")
+    db_session.add(db_ingredient)
+    await db_session.flush()
+    return db_ingredient
+
+@pytest.fixture(scope="module")
+def _spoonacular_client_mock():
+    # Building a spec'd mock walks the whole SpoonacularClient API; do it once per module.
+    # spec_set also rejects attributes the real client doesn't have.
+    return AsyncMock(spec_set=SpoonacularClient)
 
+@pytest.fixture
+def mock_spoonacular_client(_spoonacular_client_mock: AsyncMock):
+    yield _spoonacular_client_mock
+    _spoonacular_client_mock.reset_mock(return_value=True, side_effect=True)
 
 @pytest.fixture
-def mock_db_session():
-    session = MagicMock(spec=Session)
-    # Mock query results as needed, e.g., for existing recipe checks or ingredient lookups
-    session.execute.return_value.scalars.return_value.first.return_value = None # Default: no existing recipe
+def recipe_service(db_session: AsyncSession, mock_spoonacular_client: AsyncMock):
+    return RecipeService(db=db_session, spoonacular_client=mock_spoonacular_client)
+
+# Every nutrition field the mapper fills in, all unset
+NO_NUTRITION = dict.fromkeys(NUTRIENT_ALIASES)
+
+
+@pytest.mark.parametrize(
+    "payload, expected_nutrition",
+    [
+        pytest.param(
+            SAMPLE_SPOONACULAR_NUTRITION_RESPONSE,
+            # "Carbohydrates" wins over "Net Carbohydrates"
+            {"calories": 550.0, "protein": 25.0, "carbohydrates": 75.0, "fat": 15.0},
+            id="with_nutrition",
+        ),
+        pytest.param(SAMPLE_SPOONACULAR_NO_NUTRITION_RESPONSE, NO_NUTRITION, id="no_nutrition"),
+    ],
+)
+async def test_import_recipe_from_spoonacular(recipe_service: RecipeService, mock_spoonacular_client: AsyncMock, user: User, payload, expected_nutrition):
+    spoonacular_id = payload["id"]
+    mock_spoonacular_client.get_recipe_details.return_value = payload
 
-    # Mock for _get_or_create_ingredient
-    # This mock needs to be more sophisticated if testing complex ingredient logic
-    mock_ingredient = MagicMock()
-    mock_ingredient.id = uuid4()
-    session.query.return_value.filter_by.return_value.first.return_value = None # No existing ingredient
+    result_recipe: RecipePublic = await recipe_service.import_recipe_from_spoonacular(spoonacular_id, user.id)
 
-    # session.add, session.commit, session.refresh will be called, mock them if necessary
-    # For RecipeService.create_recipe, these are called on db_recipe_obj
-    # The service method itself returns a RecipePublic, so direct db_recipe_obj inspection is tricky
-    # without further mocking or a more integrated test setup.
-    # For now, focusing on the RecipePublic output from import_recipe_from_spoonacular.
+    assert result_recipe.title == payload["title"]
+    assert result_recipe.spoonacular_id == spoonacular_id
+    assert {field: getattr(result_recipe, field) for field in expected_nutrition} == expected_nutrition
+    assert sorted(ri.ingredient.name for ri in result_recipe.recipe_ingredients) == sorted(
+        ing["nameClean"].lower() for ing in payload["extendedIngredients"]
+    )
 
-    return session
+    mock_spoonacular_client.get_recipe_details.assert_called_once_with(spoonacular_id, include_nutrition=True)
 
-@pytest.fixture
-def mock_spoonacular_client():
-    client = AsyncMock(spec=SpoonacularClient)
-    return client
 
-@pytest.fixture
-def recipe_service(mock_db_session):
-    # Patching SpoonacularClient instantiation within RecipeService if it's created there,
-    # or pass the mock_spoonacular_client if it's injected.
-    # For this example, let's assume RecipeService might instantiate SpoonacularClient,
-    # or we can patch where it's used.
-    # The current RecipeService does not seem to take SpoonacularClient in __init__.
-    # It's instantiated ad-hoc in methods. So we'll need to patch it there.
-    return RecipeService(db=mock_db_session)
-
-@pytest.mark.asyncio
-async def test_import_recipe_from_spoonacular_with_nutrition(recipe_service: RecipeService, mock_db_session: MagicMock, mock_spoonacular_client: AsyncMock):
-    user_id = uuid4()
-    spoonacular_id = SAMPLE_SPOONACULAR_NUTRITION_RESPONSE["id"]
-
-    # Mock the SpoonacularClient's get_recipe_details method
-    mock_spoonacular_client.get_recipe_details.return_value = SAMPLE_SPOONACULAR_NUTRITION_RESPONSE
+async def test_import_recipe_concurrent_duplicate(recipe_service: RecipeService, mock_spoonacular_client: AsyncMock, db_session: AsyncSession, user: User):
+    payload = SAMPLE_SPOONACULAR_NUTRITION_RESPONSE
 
-    # Mock _get_or_create_ingredient to simplify ingredient handling
-    # It should return a mock DBIngredient object with an ID
-    mock_ingredient_db = MagicMock()
-    mock_ingredient_db.id = uuid4()
-    mock_ingredient_db.name = "Test Ingredient"
-    mock_ingredient_db.category = "Test Category"
-
-    # The service calls `self.db.execute(stmt).scalars().first()` for existing ingredient checks,
-    # and `self.db.add`, `self.db.commit`, `self.db.refresh` for new ones.
-    # The `_get_or_create_ingredient` method is complex.
-    # We can mock it directly on the service instance for a more focused unit test.
-
-    recipe_service._get_or_create_ingredient = AsyncMock(return_value=mock_ingredient_db)
-
-    with patch('app.services.recipe_service.SpoonacularClient', return_value=mock_spoonacular_client):
-        # Mocking the DB behavior for create_recipe part
-        # create_recipe adds a DBRecipe and then refreshes it.
-        # We need to ensure that the object passed to add() is captured or mocked,
-        # and that refresh() populates it with necessary fields like 'id', 'created_at', etc.
-
-        # This part is tricky because create_recipe does a lot of DB interaction.
-        # A simpler approach for this unit test might be to also mock parts of create_recipe,
-        # or to validate the RecipeCreate object passed into it.
-        # However, the goal is to test the *result* of import_recipe_from_spoonacular.
-
-        # Let's refine the mock_db_session to better handle the create_recipe flow.
-        # When self.db.add(db_recipe_obj) is called, we can capture db_recipe_obj.
-        # Then, when self.db.refresh(db_recipe_obj) is called, we can manually add attributes.
-
-        captured_db_recipe = None
-        def capture_add(obj):
-            nonlocal captured_db_recipe
-            captured_db_recipe = obj
-
-        def mock_refresh(obj):
-            obj.id = uuid4()
-            obj.created_at = "2023-01-01T12:00:00Z" # Placeholder
-            obj.updated_at = "2023-01-01T12:00:00Z" # Placeholder
-            obj.average_rating = 0.0 # Default from model
-            obj.rating_count = 0 # Default from model
-            # recipe_ingredients will be populated by the service, ensure they have .ingredient data
-            for ri in obj.recipe_ingredients:
-                if not hasattr(ri, 'ingredient') or ri.ingredient is None:
-                    # Attach a mock DBIngredient if not present.
-                    # This assumes ri.ingredient_id is set.
-                    mock_ing = MagicMock()
-                    mock_ing.id = ri.ingredient_id
-                    mock_ing.name = "Mocked Ing from Refresh"
-                    mock_ing.category = "Mocked Cat"
-                    ri.ingredient = mock_ing
-
-
-        mock_db_session.add = MagicMock(side_effect=capture_add)
-        mock_db_session.refresh = MagicMock(side_effect=mock_refresh)
-        # Mock the check for existing recipe by spoonacular_id to return None (not existing)
-        mock_db_session.execute.return_value.scalars.return_value.first.return_value = None
-
-
-        result_recipe: RecipePublic = await recipe_service.import_recipe_from_spoonacular(spoonacular_id, user_id)
-
-    assert result_recipe is not None
-    assert result_recipe.title == SAMPLE_SPOONACULAR_NUTRITION_RESPONSE["title"]
-    assert result_recipe.spoonacular_id == spoonacular_id
-    assert result_recipe.calories == 550.0
-    assert result_recipe.protein == 25.0
-    assert result_recipe.fat == 15.0
-    assert result_recipe.carbohydrates == 75.0 # or 70.0 if "Net Carbohydrates" is prioritized by mapper
+    async def import_elsewhere_first(*args, **kwargs):
+        # Another request saves the same recipe after this one checked for it
+        db_session.add(DBRecipe(title="Imported elsewhere", instructions=[], spoonacular_id=payload["id"]))
+        await db_session.flush()
+        return payload
 
-    mock_spoonacular_client.get_recipe_details.assert_called_once_with(spoonacular_id, include_nutrition=True)
-    # Further assertions on db interactions can be added if needed
-
-@pytest.mark.asyncio
-async def test_import_recipe_from_spoonacular_no_nutrition(recipe_service: RecipeService, mock_db_session: MagicMock, mock_spoonacular_client: AsyncMock):
-    user_id = uuid4()
-    spoonacular_id = SAMPLE_SPOONACULAR_NO_NUTRITION_RESPONSE["id"]
-
-    mock_spoonacular_client.get_recipe_details.return_value = SAMPLE_SPOONACULAR_NO_NUTRITION_RESPONSE
-
-    mock_ingredient_db = MagicMock()
-    mock_ingredient_db.id = uuid4()
-    recipe_service._get_or_create_ingredient = AsyncMock(return_value=mock_ingredient_db)
-
-    captured_db_recipe = None
-    def capture_add(obj):
-        nonlocal captured_db_recipe
-        captured_db_recipe = obj
-
-    def mock_refresh(obj): # Simplified refresh for this test
-        obj.id = uuid4()
-        obj.created_at = "2023-01-01T12:00:00Z"
-        obj.updated_at = "2023-01-01T12:00:00Z"
-        obj.average_rating = 0.0
-        obj.rating_count = 0
-        for ri in obj.recipe_ingredients:
-            if not hasattr(ri, 'ingredient') or ri.ingredient is None:
-                mock_ing = MagicMock()
-                mock_ing.id = ri.ingredient_id
-                mock_ing.name = "Mocked Ing from Refresh"
-                mock_ing.category = "Mocked Cat"
-                ri.ingredient = mock_ing
-
-    mock_db_session.add = MagicMock(side_effect=capture_add)
-    mock_db_session.refresh = MagicMock(side_effect=mock_refresh)
-    mock_db_session.execute.return_value.scalars.return_value.first.return_value = None # No existing recipe
-
-    with patch('app.services.recipe_service.SpoonacularClient', return_value=mock_spoonacular_client):
-        result_recipe: RecipePublic = await recipe_service.import_recipe_from_spoonacular(spoonacular_id, user_id)
-
-    assert result_recipe is not None
-    assert result_recipe.title == SAMPLE_SPOONACULAR_NO_NUTRITION_RESPONSE["title"]
-    assert result_recipe.spoonacular_id == spoonacular_id
-    assert result_recipe.calories is None
-    assert result_recipe.protein is None
-    assert result_recipe.fat is None
-    assert result_recipe.carbohydrates is None # Mapper should map to None if not found by specific names
+    mock_spoonacular_client.get_recipe_details.side_effect = import_elsewhere_first
 
-    mock_spoonacular_client.get_recipe_details.assert_called_once_with(spoonacular_id, include_nutrition=True)
+    # Surfaces unchanged, so the app-wide handler can answer 409
+    with pytest.raises(IntegrityError):
+        await recipe_service.import_recipe_from_spoonacular(payload["id"], user.id)
 
-# TODO: Add tests for direct recipe creation/update if those schemas were changed
-# For example, test RecipeService.create_recipe if it now takes nutritional info directly.
-# Based on previous tasks, RecipeCreate was updated, so create_recipe should handle these fields.
 
-@pytest.mark.asyncio
-async def test_create_recipe_with_nutrition(recipe_service: RecipeService, mock_db_session: MagicMock):
-    user_id = uuid4()
-    recipe_in = RecipeCreate(
+def _manual_recipe(**nutrition) -> RecipeCreate:
+    return RecipeCreate(
         title="Test Manual Recipe",
-        description="A recipe created manually with nutrition.",
+        description="A recipe created manually.",
         instructions=[{"step_number": 1, "instruction": "Mix it."}],
         ingredients=[{
-            "ingredient_id": uuid4(), # Mocked ingredient ID
+            "ingredient_id": INGREDIENT_ID,
             "quantity": 100,
             "unit": "g",
             "preparation_note": "diced"
         }],
-        calories=300.5,
-        protein=10.2,
-        carbohydrates=30.7,
-        fat=15.1,
-        # Other RecipeCreate fields
         prep_time_minutes=10,
         cook_time_minutes=20,
         servings=2,
-        difficulty_level="easy",
-        cuisine_type="home",
-        dietary_tags=["vegan"],
+        **nutrition,
     )
 
-    # Mock DB interactions for create_recipe
-    # Similar to import_recipe, but RecipeService.create_recipe is called directly.
-    captured_db_recipe = None
-    def capture_add(obj):
-        nonlocal captured_db_recipe
-        captured_db_recipe = obj
-        # Simulate that obj.recipe_ingredients are DBRecipeIngredient instances
-        # and need their .ingredient populated for the response part
-        for ri_link in obj.recipe_ingredients:
-            # In a real scenario, ri_link.ingredient_id would be used to fetch DBIngredient
-            # Here, we mock that DBIngredient is available
-            mock_ing_db = MagicMock(spec=DBIngredient) # Use spec for more accurate mocking
-            mock_ing_db.id = ri_link.ingredient_id
-            mock_ing_db.name = "Fetched Ingredient"
-            mock_ing_db.category = "Fetched Category"
-
-            # The service fetches ingredient details using:
-            # ingredient_db = self.db.query(DBIngredient).get(ri.ingredient_id)
-            # So, the mock_db_session needs to handle this.
-
-            # We can refine the mock_db_session.query().get() behavior
-            # For now, let's assume the refresh mock below handles it.
-
-    def mock_refresh(obj):
-        obj.id = uuid4()
-        obj.created_at = "2023-01-01T12:00:00Z"
-        obj.updated_at = "2023-01-01T12:00:00Z"
-        obj.average_rating = 0.0
-        obj.rating_count = 0
-        # Populate ri.ingredient for each item in obj.recipe_ingredients
-        for ri in obj.recipe_ingredients:
-            if not hasattr(ri, 'ingredient') or ri.ingredient is None:
-                mock_ing = MagicMock(spec=DBIngredient)
-                mock_ing.id = ri.ingredient_id
-                mock_ing.name = "Mocked Ing In Refresh"
-                mock_ing.category = "Mocked Cat"
-                ri.ingredient = mock_ing
-
-
-    mock_db_session.add = MagicMock(side_effect=capture_add)
-    mock_db_session.commit = MagicMock()
-    mock_db_session.refresh = MagicMock(side_effect=mock_refresh)
-
-    # Mock for the ingredient query in create_recipe
-    # self.db.query(DBIngredient).get(ri.ingredient_id)
-    mock_queried_ingredient = MagicMock(spec=DBIngredient)
-    mock_queried_ingredient.id = recipe_in.ingredients[0].ingredient_id # Match the one in RecipeCreate
-    mock_queried_ingredient.name = "Queried Ingredient"
-    mock_queried_ingredient.category = "Queried Category"
-
-    # Setup query mock: session.query(DBIngredient).get(...)
-    # This is a bit simplified; a more robust mock might involve a dictionary lookup.
-    # For a single ingredient, this should work.
-    mock_query_obj = MagicMock()
-    mock_query_obj.get.return_value = mock_queried_ingredient
-    mock_db_session.query.return_value = mock_query_obj
-
-
-    result_recipe: RecipePublic = await recipe_service.create_recipe(recipe_in, user_id)
-
-    assert result_recipe is not None
+WITH_NUTRITION = {"calories": 300.5, "protein": 10.2, "carbohydrates": 30.7, "fat": 15.1}
+
+
+# Validated once at collection; create_recipe only reads its input.
+@pytest.mark.parametrize(
+    "recipe_in, nutrition",
+    [
+        pytest.param(_manual_recipe(**WITH_NUTRITION), WITH_NUTRITION, id="with_nutrition"),
+        pytest.param(_manual_recipe(), NO_NUTRITION, id="without_nutrition"),
+    ],
+)
+async def test_create_recipe(recipe_service: RecipeService, db_session: AsyncSession, user: User, ingredient: DBIngredient, recipe_in: RecipeCreate, nutrition):
+    result_recipe: RecipePublic = await recipe_service.create_recipe(recipe_in, user.id)
+
     assert result_recipe.title == recipe_in.title
-    assert result_recipe.calories == recipe_in.calories
-    assert result_recipe.protein == recipe_in.protein
-    assert result_recipe.carbohydrates == recipe_in.carbohydrates
-    assert result_recipe.fat == recipe_in.fat
-
-    # Verify that captured_db_recipe (the DBRecipe instance) also has these fields set
-    assert captured_db_recipe is not None
-    assert captured_db_recipe.calories == recipe_in.calories
-    assert captured_db_recipe.protein == recipe_in.protein
-    assert captured_db_recipe.carbohydrates == recipe_in.carbohydrates
-    assert captured_db_recipe.fat == recipe_in.fat
-
-
-@pytest.mark.asyncio
-async def test_create_recipe_without_nutrition(recipe_service: RecipeService, mock_db_session: MagicMock):
-    user_id = uuid4()
-    recipe_in = RecipeCreate(
-        title="Test Manual Recipe No Nutrition",
-        description="A recipe created manually without nutrition.",
-        instructions=[{"step_number": 1, "instruction": "Mix it."}],
-        ingredients=[{
-            "ingredient_id": uuid4(), # Mocked ingredient ID
-            "quantity": 100,
-            "unit": "g",
-        }],
-        # Nutritional fields are Optional, so not providing them
-        # Other RecipeCreate fields
-        prep_time_minutes=10,
-        cook_time_minutes=20,
-        servings=2,
+    assert {field: getattr(result_recipe, field) for field in nutrition} == nutrition
+    assert result_recipe.recipe_ingredients[0].ingredient.name == ingredient.name
+
+    # The stored row carries the nutrition fields too
+    db_recipe = await db_session.get(DBRecipe, result_recipe.id)
+    assert {field: getattr(db_recipe, field) for field in nutrition} == nutrition
+
+
+async def test_update_recipe_ingredients(recipe_service: RecipeService, db_session: AsyncSession, user: User, ingredient: DBIngredient):
+    created = await recipe_service.create_recipe(_manual_recipe(), user.id)
+    link_ids = select(DBRecipeIngredient.id).where(DBRecipeIngredient.recipe_id == created.id)
+    original_link_id = (await db_session.execute(link_ids)).scalar_one()
+    onion = DBIngredient(name="onion")
+    db_session.add(onion)
+    await db_session.flush()
+
+    # Changing one quantity and adding an ingredient keeps the existing link row
+    updated = await recipe_service.update_recipe(created.id, RecipeUpdate(ingredients=[
+        {"ingredient_id": INGREDIENT_ID, "quantity": 250, "unit": "g", "preparation_note": "diced"},
+        {"ingredient_id": onion.id, "quantity": 1, "unit": "whole"},
+    ]), user.id)
+
+    assert {(ri.ingredient.name, ri.quantity) for ri in updated.recipe_ingredients} == {("test ingredient", 250), ("onion", 1)}
+    assert original_link_id in (await db_session.execute(link_ids)).scalars().all()
+
+    updated = await recipe_service.update_recipe(created.id, RecipeUpdate(ingredients=[
+        {"ingredient_id": onion.id, "quantity": 1, "unit": "whole"},
+    ]), user.id)
+
+    assert [ri.ingredient.name for ri in updated.recipe_ingredients] == ["onion"]
+
+
+async def test_delete_recipe(recipe_service: RecipeService, db_session: AsyncSession, user: User, ingredient: DBIngredient):
+    created = await recipe_service.create_recipe(_manual_recipe(), user.id)
+
+    # Another user can't delete it, and it is still there afterwards
+    with pytest.raises(RecipeForbiddenException):
+        await recipe_service.delete_recipe(created.id, UUID(int=3))
+    assert await recipe_service.get_recipe_by_id(created.id) is not None
+
+    await recipe_service.delete_recipe(created.id, user.id)
+    assert await recipe_service.get_recipe_by_id(created.id) is None
+
+    with pytest.raises(RecipeNotFoundException):
+        await recipe_service.delete_recipe(created.id, user.id)
+
+
+@pytest.mark.parametrize("page, expected_count", [(1, 2), (2, 1), (3, 0)], ids=["full_page", "last_page", "past_the_end"])
+async def test_get_recipes_list_total(recipe_service: RecipeService, user: User, ingredient: DBIngredient, page, expected_count):
+    for _ in range(3):
+        await recipe_service.create_recipe(_manual_recipe(), user.id)
+
+    recipes, pagination = await recipe_service.get_recipes_list(page=page, limit=2)
+
+    # Each recipe comes back once, and the page size counts recipes, not ingredient rows
+    assert len(recipes) == expected_count
+    assert pagination["totalItems"] == 3
+    assert pagination["totalPages"] == 2
+
+
+async def test_get_recipes_list_matches_detail(recipe_service: RecipeService, user: User, ingredient: DBIngredient):
+    recipe_in = _manual_recipe(**WITH_NUTRITION).model_copy(update={"image_url": "https://example.com/pasta.jpg"})
+    created = await recipe_service.create_recipe(recipe_in, user.id)
+
+    # The list skips validation; it must still produce what the validated detail view does
+    recipes, _ = await recipe_service.get_recipes_list(page=1, limit=10)
+
+    assert recipes[0].model_dump_json(warnings="error") == created.model_dump_json()
+
+
+@pytest.mark.parametrize("page, expected_count, has_next", [(1, 2, True), (2, 1, False)], ids=["full_page", "last_page"])
+async def test_get_recipes_list_without_total(recipe_service: RecipeService, user: User, ingredient: DBIngredient, page, expected_count, has_next):
+    for _ in range(3):
+        await recipe_service.create_recipe(_manual_recipe(), user.id)
+
+    recipes, pagination = await recipe_service.get_recipes_list(page=page, limit=2, include_total=False)
+
+    assert len(recipes) == expected_count
+    assert pagination["hasNext"] is has_next
+    assert "totalItems" not in pagination and "totalPages" not in pagination
+
+
+async def test_get_recipes_list_search(recipe_service: RecipeService, user: User, ingredient: DBIngredient):
+    in_description = await recipe_service.create_recipe(
+        _manual_recipe().model_copy(update={"title": "Weeknight Pasta", "description": "With roasted tomatoes."}), user.id
     )
+    in_title = await recipe_service.create_recipe(
+        _manual_recipe().model_copy(update={"title": "Tomato Soup"}), user.id
+    )
+    await recipe_service.create_recipe(_manual_recipe().model_copy(update={"title": "Pancakes"}), user.id)
 
-    captured_db_recipe = None
-    def capture_add(obj):
-        nonlocal captured_db_recipe
-        captured_db_recipe = obj
-
-    def mock_refresh(obj):
-        obj.id = uuid4()
-        obj.created_at = "2023-01-01T12:00:00Z"
-        obj.updated_at = "2023-01-01T12:00:00Z"
-        obj.average_rating = 0.0
-        obj.rating_count = 0
-        for ri in obj.recipe_ingredients: # Ensure .ingredient is populated
-            if not hasattr(ri, 'ingredient') or ri.ingredient is None:
-                mock_ing = MagicMock(spec=DBIngredient)
-                mock_ing.id = ri.ingredient_id
-                mock_ing.name = "Mocked Ing In Refresh"
-                mock_ing.category = "Mocked Cat"
-                ri.ingredient = mock_ing
-
-    mock_db_session.add = MagicMock(side_effect=capture_add)
-    mock_db_session.commit = MagicMock()
-    mock_db_session.refresh = MagicMock(side_effect=mock_refresh)
-
-    mock_queried_ingredient = MagicMock(spec=DBIngredient)
-    mock_queried_ingredient.id = recipe_in.ingredients[0].ingredient_id
-    mock_queried_ingredient.name = "Queried Ingredient No Nutrition"
-    mock_queried_ingredient.category = "Queried Category"
-    mock_query_obj = MagicMock()
-    mock_query_obj.get.return_value = mock_queried_ingredient
-    mock_db_session.query.return_value = mock_query_obj
-
-    result_recipe: RecipePublic = await recipe_service.create_recipe(recipe_in, user_id)
-
-    assert result_recipe is not None
-    assert result_recipe.title == recipe_in.title
-    assert result_recipe.calories is None # Should be None as per Pydantic model Optional[float]
-    assert result_recipe.protein is None
-    assert result_recipe.carbohydrates is None
-    assert result_recipe.fat is None
-
-    assert captured_db_recipe is not None
-    assert captured_db_recipe.calories is None # DB field is nullable
-    assert captured_db_recipe.protein is None
-    assert captured_db_recipe.carbohydrates is None
-    assert captured_db_recipe.fat is None
-
-# Note: The actual carbohydrate value asserted for SAMPLE_SPOONACULAR_NUTRITION_RESPONSE
-# depends on the mapper logic: if it finds "Carbohydrates" first or "Net Carbohydrates".
-# The current mapper logic:
-# if name == "carbohydrates": carbohydrates = amount
-# elif name == "net carbohydrates" and carbohydrates is None: carbohydrates = amount
-# So, if "Carbohydrates" is present, it will be used.
-# SAMPLE_SPOONACULAR_NUTRITION_RESPONSE has "Carbohydrates" with amount 75.0. So, 75.0 is correct.
-
-# Further tests could include:
-# - What if Spoonacular returns nutrition info as strings? (The Pydantic models expect float)
-#   The mapper currently takes `amount` as is. Pydantic will try to coerce.
-# - Test edge cases for `_get_or_create_ingredient` if that logic is complex.
-#   (Here, it's mostly mocked on the service for simplicity).
-# - Test updates to recipes with nutritional info. (RecipeUpdate schema was also updated).
-#   This would involve `RecipeService.update_recipe`.
-# - Ensure the test database session (`mock_db_session`) accurately mocks all necessary DB calls
-#   for the methods under test. This can get quite involved.
-#   For example, the `create_recipe` and `import_recipe_from_spoonacular` methods in `RecipeService`
-#   interact with `DBRecipe`, `DBRecipeIngredient`, and `DBIngredient` tables.
-#   The current mocks are somewhat simplified.
-#   A more robust approach for service layer tests might involve an in-memory SQLite database
-#   with real SQLAlchemy models, if true async support for SQLite in tests is handled.
-#   However, for unit tests with mocks, this level of detail is a common trade-off.
-
-# One key aspect for the create_recipe part of the tests:
-# The RecipeService.create_recipe method, when constructing RecipePublic, does this:
-# `ingredient_db = self.db.query(DBIngredient).get(ri.ingredient_id)`
-# This needs to be mocked in `mock_db_session` for `test_create_recipe_...` tests.
-# I've added a basic mock for this in `test_create_recipe_with_nutrition` and `_without_nutrition`.
-# The `captured_db_recipe.calories` etc. assertions in `test_create_recipe_...` are good
-# because they check what's actually being written to the DB model before commit.
-
-# The `mock_refresh` function needs to ensure that `ri.ingredient` is populated
-# because the `RecipePublic` construction relies on it.
-# I've updated `mock_refresh` in all tests to simulate this.
-
-# Final check on the carbohydrate assertion:
-# SAMPLE_SPOONACULAR_NUTRITION_RESPONSE has:
-#   {"name": "Carbohydrates", "amount": 75.0, "unit": "g"},
-#   {"name": "Net Carbohydrates", "amount": 70.0, "unit": "g"}
-# The mapper logic is:
-#   if name == "carbohydrates": carbohydrates = amount
-#   elif name == "net carbohydrates" and carbohydrates is None: carbohydrates = amount
-# So, "Carbohydrates" (75.0) will be picked first. The assertion `assert result_recipe.carbohydrates == 75.0` is correct.
-
-# One more check: the `create_recipe` in `RecipeService` does not directly take nutritional fields.
-# It takes a `RecipeCreate` object. `RecipeCreate` *does* have these fields.
-# The service then creates a `DBRecipe` object.
-# `db_recipe_obj = DBRecipe(title=recipe_in.title, ..., spoonacular_id=recipe_in.spoonacular_id)`
-# This instantiation of `DBRecipe` needs to also pass the nutritional fields from `recipe_in`.
-# This was NOT part of the previous subtasks for `recipe_service.py` explicitly, but it's an
-# implied change for `create_recipe` to fully support the new fields in `RecipeCreate`.
-# Let's assume for now the tests I've written for `create_recipe` will FAIL if `DBRecipe`
-# is not correctly populated with these fields from `recipe_in` within `RecipeService.create_recipe`.
-# If they fail, a subsequent step would be to fix `RecipeService.create_recipe`.
-# The current tests assert `captured_db_recipe.calories == recipe_in.calories`, etc.
-# This will verify if the `DBRecipe` model instance gets these values.
-# It's possible `RecipeService.create_recipe` needs an update like:
-# `calories=recipe_in.calories, protein=recipe_in.protein, ...` when creating `DBRecipe`.
-# I will add this to the report as a potential necessary change if tests fail.
-# Let's assume the tests pass for now and the `DBRecipe` instantiation is correct.
-# (The Pydantic model `RecipeCreate` has the fields, and the DB model `DBRecipe` has them.
-# The SQLAlchemy model instantiation `DBRecipe(...)` will map them if `recipe_in.calories` etc. are passed).
-# This is an important point, I should verify this in `RecipeService.create_recipe`.
-# I will do a quick read of `RecipeService.create_recipe` again.
-
-# Ok, I will re-read `recipe_service.py` specifically for the `create_recipe` method's instantiation of `DBRecipe`.
-# This is crucial for the `test_create_recipe_...` tests to be valid.
-# (This is a self-correction/verification step based on writing the tests).I've created the test file `smart_recipe_meal_planner/app/tests/services/test_recipe_service.py` with:
--   Mock Spoonacular responses (with and without nutrition).
--   Fixtures for `mock_db_session`, `mock_spoonacular_client`, and `recipe_service`.
--   Test for `import_recipe_from_spoonacular` with full nutrition data, asserting correct mapping.
--   Test for `import_recipe_from_spoonacular` with missing nutrition data, asserting fields are `None`.
--   Tests for `create_recipe` (which uses `RecipeCreate` Pydantic model that now includes nutritional fields):
-    -   One test providing nutritional data.
-    -   One test omitting nutritional data (fields should be `None`).
-
-A critical point arose while writing these tests: the `RecipeService.create_recipe` method itself needs to map the nutritional fields from the input `RecipeCreate` Pydantic model to the `DBRecipe` SQLAlchemy model when it's instantiated. If it doesn't, the `test_create_recipe_*` tests will fail on assertions like `captured_db_recipe.calories == recipe_in.calories`.
-
-I need to verify the `create_recipe` method in `recipe_service.py` to ensure it correctly passes these new fields.
+    recipes, pagination = await recipe_service.get_recipes_list(page=1, limit=10, search_query="tomato")
+
+    # Stemmed matches only, title matches ranked first
+    assert [recipe.id for recipe in recipes] == [in_title.id, in_description.id]
+    assert pagination["totalItems"] == 2
+
+
+async def test_bulk_favorites(recipe_service: RecipeService, user: User, ingredient: DBIngredient):
+    first = await recipe_service.create_recipe(_manual_recipe(), user.id)
+    second = await recipe_service.create_recipe(_manual_recipe(), user.id)
+
+    assert await recipe_service.add_recipes_to_favorites([first.id, first.id], user.id) == 1
+    # Already-saved recipes are skipped rather than failing the batch
+    assert await recipe_service.add_recipes_to_favorites([first.id, second.id], user.id) == 1
+
+    assert await recipe_service.remove_recipes_from_favorites([first.id, second.id], user.id) == 2
+    assert await recipe_service.remove_recipes_from_favorites([first.id], user.id) == 0
+
+
+@pytest.mark.parametrize(
+    "filters, expected_titles",
+    [
+        pytest.param({"cuisine": "Italian"}, ["Quick Vegan Pasta", "Slow Ragu"], id="cuisine"),
+        pytest.param({"dietary_tags": ["vegan"]}, ["Quick Vegan Pasta"], id="dietary_tags"),
+        pytest.param({"max_cook_time": 30}, ["Quick Vegan Pasta"], id="max_cook_time"),
+        pytest.param({"cuisine": "Italian", "max_cook_time": 300}, ["Quick Vegan Pasta", "Slow Ragu"], id="combined"),
+    ],
+)
+async def test_get_recipes_list_filters(recipe_service: RecipeService, user: User, ingredient: DBIngredient, filters, expected_titles):
+    for title, cuisine, tags, cook_time in [
+        ("Slow Ragu", "Italian", ["dairy-free"], 180),
+        ("Quick Vegan Pasta", "Italian", ["vegan", "dairy-free"], 15),
+        ("Curry", "Indian", [], 45),
+    ]:
+        await recipe_service.create_recipe(
+            _manual_recipe().model_copy(update={"title": title, "cuisine_type": cuisine, "dietary_tags": tags, "cook_time_minutes": cook_time}),
+            user.id,
+        )
+
+    recipes, pagination = await recipe_service.get_recipes_list(page=1, limit=10, **filters)
+
+    assert sorted(recipe.title for recipe in recipes) == expected_titles
+    assert pagination["totalItems"] == len(expected_titles)
+
+
+async def test_import_reuses_existing_ingredients(recipe_service: RecipeService, mock_spoonacular_client: AsyncMock, db_session: AsyncSession, user: User):
+    # "pasta" already exists (under different casing); "tomato sauce" does not
+    pasta = DBIngredient(name="Pasta", category="Pantry")
+    db_session.add(pasta)
+    await db_session.flush()
+    mock_spoonacular_client.get_recipe_details.return_value = SAMPLE_SPOONACULAR_NUTRITION_RESPONSE
+
+    result_recipe = await recipe_service.import_recipe_from_spoonacular(SAMPLE_SPOONACULAR_NUTRITION_RESPONSE["id"], user.id)
+
+    ingredient_ids = {ri.ingredient.name: ri.ingredient.id for ri in result_recipe.recipe_ingredients}
+    assert ingredient_ids["Pasta"] == pasta.id
+    created = (await db_session.execute(select(DBIngredient).where(DBIngredient.name == "tomato sauce"))).scalars().all()
+    assert [ing.id for ing in created] == [ingredient_ids["tomato sauce"]]
+
+
+async def test_get_recipes_list_cursor(recipe_service: RecipeService, user: User, ingredient: DBIngredient):
+    # Created in one transaction, so they share created_at and only the id orders them
+    for title in ("First", "Second", "Third"):
+        await recipe_service.create_recipe(_manual_recipe().model_copy(update={"title": title}), user.id)
+    offset_page, _ = await recipe_service.get_recipes_list(page=1, limit=3)
+
+    first_page, first_meta = await recipe_service.get_recipes_list(page=1, limit=2)
+    second_page, second_meta = await recipe_service.get_recipes_list(page=1, limit=2, cursor=first_meta["nextCursor"])
+
+    # Cursor pages continue exactly where the offset page left off
+    assert [r.id for r in first_page + second_page] == [r.id for r in offset_page]
+    assert second_meta == {"hasNext": False, "nextCursor": None, "itemsPerPage": 2}
+
+    with pytest.raises(ValueError):
+        await recipe_service.get_recipes_list(page=1, limit=2, cursor="not-a-cursor")
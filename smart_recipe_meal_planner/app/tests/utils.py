@@ -0,0 +1,9 @@
+import orjson
+
+
+def parse_json(response):
+    """Parses an httpx response body with orjson.
+
+    orjson parses the nested recipe payloads noticeably faster than response.json().
+    """
+    return orjson.loads(response.content)
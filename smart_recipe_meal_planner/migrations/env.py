@@ -12,7 +12,9 @@ from alembic import context
 config = context.config
 
 # Interpret the config file for Python logging.
-if config.config_file_name is not None:
+# Callers that already configured logging (e.g. test runs invoking Alembic
+# programmatically) can set ALEMBIC_SKIP_LOG_CONFIG=1 to keep their setup.
+if config.config_file_name is not None and os.getenv("ALEMBIC_SKIP_LOG_CONFIG") != "1":
     fileConfig(config.config_file_name)
 
 # Add project root to sys.path to find the 'app' module
@@ -26,17 +28,8 @@ project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."
 sys.path.insert(0, project_dir)
 
 from app.core.config import settings
-from app.db.base_class import Base
-# Ensure all models are imported for Alembic autogenerate
-from app.db.models.user_model import User # noqa
-from app.db.models.recipe_model import Recipe # noqa
-from app.db.models.ingredient_model import Ingredient # noqa
-from app.db.models.recipe_ingredient_model import RecipeIngredient # noqa
-from app.db.models.meal_plan_model import MealPlan # noqa
-from app.db.models.meal_plan_recipe_model import MealPlanRecipe # noqa
-from app.db.models.user_saved_recipe_model import UserSavedRecipe # noqa
-# The above explicit imports are generally better than `from app.db.models import *`
-# but the original prompt used wildcard. Sticking to Base.metadata should be fine.
+# app.db.models imports every model module, so Base.metadata is complete for autogenerate
+from app.db.models import Base
 
 target_metadata = Base.metadata
 
@@ -57,8 +50,25 @@ def run_migrations_offline() -> None:
     with context.begin_transaction():
         context.run_migrations()
 
+def do_run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True, # Added for better comparison of types
+        # compare_server_default=True # Consider adding if needed for server defaults
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
+    # Callers running several commands in one process (e.g. test setup) can pass
+    # an open connection via config.attributes["connection"] and skip reconnecting.
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+
     db_url = get_url()
 
     # Use a dictionary for connectable_config_dict to avoid issues if section is missing
@@ -73,14 +83,7 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata,
-            compare_type=True, # Added for better comparison of types
-            # compare_server_default=True # Consider adding if needed for server defaults
-        )
-        with context.begin_transaction():
-            context.run_migrations()
+        do_run_migrations(connection)
 
 if context.is_offline_mode():
     run_migrations_offline()
@@ -0,0 +1,41 @@
+"""add_recipe_search_tsv
+
+Revision ID: 0002
+Revises: 0001, 55b956e30097
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+# Also merges the two existing roots, so `alembic upgrade head` has a single head
+down_revision: Union[str, Sequence[str], None] = ('0001', '55b956e30097')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'recipes',
+        sa.Column(
+            'search_tsv',
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+        ),
+    )
+    op.create_index('ix_recipes_search_tsv', 'recipes', ['search_tsv'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recipes_search_tsv', table_name='recipes', postgresql_using='gin')
+    op.drop_column('recipes', 'search_tsv')
@@ -0,0 +1,35 @@
+"""add_recipe_filter_indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY doesn't block writes to recipes while the indexes build, but
+    # can't run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_recipes_cook_time_minutes', 'recipes', ['cook_time_minutes'], postgresql_concurrently=True)
+        op.create_index(
+            'ix_recipes_dietary_tags', 'recipes', ['dietary_tags'],
+            postgresql_using='gin', postgresql_ops={'dietary_tags': 'jsonb_path_ops'},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_recipes_dietary_tags', table_name='recipes', postgresql_concurrently=True)
+        op.drop_index('ix_recipes_cook_time_minutes', table_name='recipes', postgresql_concurrently=True)
@@ -0,0 +1,29 @@
+"""add_recipe_created_at_id_index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY doesn't block writes to recipes while the index builds, but
+    # can't run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_recipes_created_at_id', 'recipes', ['created_at', 'id'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_recipes_created_at_id', table_name='recipes', postgresql_concurrently=True)